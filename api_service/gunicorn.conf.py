@@ -0,0 +1,19 @@
+"""
+Gunicorn config for the Python prediction API
+Serves WebSockets on gevent so idle connections cost a greenlet, not a thread.
+Usage: gunicorn -c api_service/gunicorn.conf.py server:app
+"""
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = "0.0.0.0:3000"
+worker_class = "gevent"
+# ws_clients lives in process memory, so a single worker must see every client
+workers = 1
+worker_connections = 1000
+
+
+def post_worker_init(worker):
+    """Start the prediction file watcher inside the serving worker"""
+    from server import start_file_watcher_thread
+    start_file_watcher_thread()
@@ -1,74 +1,156 @@
 import os
-import json
+import re
 import threading
-from flask import Flask, jsonify
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from flask_sock import Sock
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchfiles import Change, watch
 
 app = Flask(__name__)
 CORS(app)
 sock = Sock(app)
 
 FINAL_PREDICTIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_processor_service/final_predictions'))
-ws_clients = set()
+# Connections drop out on their own once the handler that owns them returns
+ws_clients = weakref.WeakSet()
+_clients_lock = threading.RLock()
+
+# Fan-out runs on a pool so one slow client can't hold up the rest; a
+# per-client lock keeps frames from overlapping when broadcasts overlap
+_BROADCAST_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix='ws-broadcast')
+_send_locks = weakref.WeakKeyDictionary()
+
+# Writers fire several modify events per save; watchfiles coalesces them into one batch
+BROADCAST_DEBOUNCE_MS = 100
+
+# Tickers may contain underscores (e.g. DPW_DE), so anchor on the file suffix
+_TICKER_RE = re.compile(r'([A-Z0-9._-]+)_prediction\.json$')
+
+# ticker -> (mtime_ns, raw JSON bytes); refreshed by the file watcher and on mtime change
+_prediction_cache = {}
+_cache_lock = threading.Lock()
+
+def load_prediction(ticker, refresh=False):
+    """Return (mtime_ns, raw bytes) for a ticker's prediction file, or None if missing"""
+    file_path = os.path.join(FINAL_PREDICTIONS_DIR, f"{ticker}_prediction.json")
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        with _cache_lock:
+            _prediction_cache.pop(ticker, None)
+        return None
+
+    with _cache_lock:
+        cached = _prediction_cache.get(ticker)
+    if cached and cached[0] == mtime and not refresh:
+        return cached
+
+    with open(file_path, 'rb') as f:
+        entry = (mtime, f.read())
+    with _cache_lock:
+        _prediction_cache[ticker] = entry
+    return entry
 
 @app.route('/api/prediction/<ticker>')
 def get_prediction(ticker):
-    ticker = ticker.upper()
-    file_path = os.path.join(FINAL_PREDICTIONS_DIR, f"{ticker}_prediction.json")
-    if os.path.exists(file_path):
-        with open(file_path) as f:
-            return jsonify(json.load(f))
-    return jsonify({"error": "Prediction not found"}), 404
+    entry = load_prediction(ticker.upper())
+    if entry is None:
+        return jsonify({"error": "Prediction not found"}), 404
+    # Files are already JSON; serve the cached bytes as-is
+    mtime, body = entry
+    response = Response(body, mimetype='application/json')
+    response.set_etag(f"{ticker.upper()}-{mtime}")
+    return response.make_conditional(request)
 
 @sock.route('/ws')
 def ws(sock):
-    ws_clients.add(sock)
+    with _clients_lock:
+        ws_clients.add(sock)
     try:
         while True:
             data = sock.receive()
             if data is None:
                 break
     finally:
-        ws_clients.remove(sock)
+        with _clients_lock:
+            ws_clients.discard(sock)
 
-def broadcast_prediction_update(ticker):
-    file_path = os.path.join(FINAL_PREDICTIONS_DIR, f"{ticker}_prediction.json")
-    if os.path.exists(file_path):
-        with open(file_path) as f:
-            data = json.load(f)
-        for client in list(ws_clients):
-            try:
-                client.send(json.dumps({
-                    "type": "prediction_update",
-                    "ticker": ticker,
-                    "data": data
-                }))
-            except Exception:
-                ws_clients.discard(client)
-
-class PredictionFileHandler(FileSystemEventHandler):
-    def on_modified(self, event):
-        if event.is_directory or not event.src_path.endswith('_prediction.json'):
+def broadcast_prediction_update(ticker, raw_bytes=None):
+    if raw_bytes is None:
+        entry = load_prediction(ticker)
+        if entry is None:
             return
-        ticker = os.path.basename(event.src_path).split('_')[0]
-        broadcast_prediction_update(ticker)
+        raw_bytes = entry[1]
+    # The file is already JSON: splice it into the envelope instead of parsing
+    # and re-serializing it, then send the bytes as a binary frame to every client
+    payload = b''.join((
+        b'{"type":"prediction_update","ticker":',
+        orjson.dumps(ticker),
+        b',"data":',
+        raw_bytes,
+        b'}',
+    ))
+    with _clients_lock:
+        clients = tuple(ws_clients)
+    for client in clients:
+        _BROADCAST_POOL.submit(_safe_send, client, payload)
 
-def start_file_watcher():
-    event_handler = PredictionFileHandler()
-    observer = Observer()
-    observer.schedule(event_handler, FINAL_PREDICTIONS_DIR, recursive=False)
-    observer.start()
+def _safe_send(client, payload):
+    with _clients_lock:
+        lock = _send_locks.setdefault(client, threading.Lock())
+    try:
+        with lock:
+            client.send(payload)
+    except Exception:
+        with _clients_lock:
+            ws_clients.discard(client)
+
+def _is_prediction_change(change, path):
+    # Also drops files whose name isn't a valid ticker before they reach a batch
+    return change != Change.deleted and _TICKER_RE.search(path) is not None
 
+def _iter_changed_tickers():
+    """Yield the set of tickers touched by each debounced batch of file changes"""
+    for changes in watch(FINAL_PREDICTIONS_DIR, watch_filter=_is_prediction_change,
+                         debounce=BROADCAST_DEBOUNCE_MS, recursive=False):
+        yield {_TICKER_RE.search(path).group(1) for _, path in changes}
+
+def _gevent_patched():
     try:
-        while True:
-            pass
-    except KeyboardInterrupt:
-        observer.stop()
-    observer.join()
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
 
-if __name__ == '__main__':
+def start_file_watcher():
+    batches = _iter_changed_tickers()
+    if _gevent_patched():
+        # The Rust watcher blocks its OS thread; step it on one dedicated native
+        # thread so only this greenlet waits on it, never the hub
+        from gevent.threadpool import ThreadPool
+        pool = ThreadPool(1)
+        next_batch = lambda: pool.apply(next, (batches, None))
+    else:
+        next_batch = lambda: next(batches, None)
+
+    while True:
+        tickers = next_batch()
+        if tickers is None:
+            break
+        for ticker in tickers:
+            # Read the file once here and hand the same bytes to the broadcaster
+            entry = load_prediction(ticker, refresh=True)
+            if entry is not None:
+                broadcast_prediction_update(ticker, raw_bytes=entry[1])
+
+def start_file_watcher_thread():
     threading.Thread(target=start_file_watcher, daemon=True).start()
-    app.run(host='0.0.0.0', port=3000)
\ No newline at end of file
+
+# Development server: one OS thread per WebSocket. For many concurrent clients
+# serve with gevent instead: gunicorn -c api_service/gunicorn.conf.py server:app
+if __name__ == '__main__':
+    start_file_watcher_thread()
+    app.run(host='0.0.0.0', port=3000)
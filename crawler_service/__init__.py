@@ -0,0 +1,4 @@
+"""
+Crawler Service package
+Run entry points as modules from the project root, e.g. python -m crawler_service.continuous_crawler
+"""
@@ -1,26 +1,19 @@
 """
 Continuous News Crawler
 Runs every 30 minutes to fetch latest articles and triggers downstream processing
+Usage: python -m crawler_service.continuous_crawler
 """
 import os
-import sys
 import time
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 
-# Add project root to sys.path so we can import data_processor_service
-PROJECT_ROOT = Path(__file__).parent.parent.resolve()
-if str(PROJECT_ROOT) not in sys.path:
-    sys.path.insert(0, str(PROJECT_ROOT))
+import orjson
 
-# Add crawler_service to sys.path for local imports
-sys.path.insert(0, str(Path(__file__).parent))
-from run_daily_crawl import run_crawl_for_company
-from config.company_config import COMPANIES
-
-# Now import from data_processor_service.continuous_processor
+from crawler_service.run_daily_crawl import run_crawl_for_company
+from crawler_service.config.company_config import COMPANIES
 from data_processor_service.continuous_processor import process_new_articles
 
 logging.basicConfig(
@@ -30,6 +23,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 CRAWLER_INTERVAL = int(os.getenv('CRAWLER_INTERVAL_MINUTES', 30)) * 60  # seconds
+CRAWLER_WORKERS = int(os.getenv('CRAWLER_WORKERS', 8))
 
 class ContinuousCrawler:
     """Continuously crawls news articles and triggers processing"""
@@ -43,40 +37,52 @@ class ContinuousCrawler:
         self.run_count += 1
         start_time = datetime.now()
         logger.info("=" * 80)
-        logger.info(f"STARTING CRAWL CYCLE #{self.run_count}")
-        logger.info(f"Time: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info("STARTING CRAWL CYCLE #%d", self.run_count)
+        logger.info("Time: %s", start_time.strftime('%Y-%m-%d %H:%M:%S'))
         logger.info("=" * 80)
 
         total_articles = 0
         successful_companies = 0
         failed_companies = []
 
-        for company in COMPANIES:
-            ticker = company['ticker']
-            try:
-                logger.info(f"\n📰 Crawling news for {ticker}...")
-                articles_count = run_crawl_for_company(ticker)
-                total_articles += articles_count
-                successful_companies += 1
-                logger.info(f"✅ {ticker}: Fetched {articles_count} articles")
+        # Crawls are serialized on the shared Scrapy runner; processing for
+        # each ticker runs in the pool while the next one crawls
+        with ThreadPoolExecutor(max_workers=max(1, min(CRAWLER_WORKERS, len(COMPANIES)))) as executor:
+            futures = {}
+            for company in COMPANIES:
+                ticker = company['ticker']
+                try:
+                    logger.info("\n📰 Crawling news for %s...", ticker)
+                    articles_count = run_crawl_for_company(ticker)
+                    total_articles += articles_count
+                    successful_companies += 1
+                    logger.info("✅ %s: Fetched %d articles", ticker, articles_count)
+                except Exception as e:
+                    logger.error("❌ %s: Failed - %s", ticker, e)
+                    failed_companies.append(ticker)
+                    continue
 
                 # Trigger data processing for this ticker
-                logger.info(f"⚙️ Processing new articles for {ticker}...")
-                process_new_articles(ticker)
+                logger.info("⚙️ Processing new articles for %s...", ticker)
+                futures[executor.submit(process_new_articles, ticker)] = ticker
 
-            except Exception as e:
-                logger.error(f"❌ {ticker}: Failed - {e}")
-                failed_companies.append(ticker)
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error("❌ %s: Failed - %s", ticker, e)
+                    failed_companies.append(ticker)
 
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
         logger.info("\n" + "=" * 80)
-        logger.info(f"CRAWL CYCLE #{self.run_count} COMPLETED")
-        logger.info(f"Duration: {duration:.2f} seconds")
-        logger.info(f"Total articles fetched: {total_articles}")
-        logger.info(f"Successful: {successful_companies}/{len(COMPANIES)} companies")
+        logger.info("CRAWL CYCLE #%d COMPLETED", self.run_count)
+        logger.info("Duration: %.2f seconds", duration)
+        logger.info("Total articles fetched: %d", total_articles)
+        logger.info("Successful: %d/%d companies", successful_companies, len(COMPANIES))
         if failed_companies:
-            logger.info(f"Failed: {', '.join(failed_companies)}")
+            logger.info("Failed: %s", ', '.join(failed_companies))
         logger.info("=" * 80 + "\n")
 
         self.last_run_time = end_time
@@ -91,25 +97,36 @@ class ContinuousCrawler:
             "failed_companies": failed
         }
         self.stats_file.parent.mkdir(exist_ok=True)
-        with open(self.stats_file, 'w') as f:
-            json.dump(stats, f, indent=2)
+        with open(self.stats_file, 'wb') as f:
+            f.write(orjson.dumps(stats, option=orjson.OPT_INDENT_2))
 
     def start(self):
         logger.info("🚀 Starting Continuous Crawler")
-        logger.info(f"Interval: Every {CRAWLER_INTERVAL / 60:.0f} minutes")
-        logger.info(f"Companies: {len(COMPANIES)}")
+        logger.info("Interval: Every %.0f minutes", CRAWLER_INTERVAL / 60)
+        logger.info("Companies: %d", len(COMPANIES))
         logger.info("")
+        # Schedule against fixed deadlines so cycle duration doesn't add drift
+        next_run = time.monotonic()
         while True:
             try:
                 self.run_crawl_cycle()
-                logger.info(f"Sleeping for {CRAWLER_INTERVAL / 60:.0f} minutes...\n")
-                time.sleep(CRAWLER_INTERVAL)
+                next_run += CRAWLER_INTERVAL
+                now = time.monotonic()
+                if next_run <= now:
+                    # Cycle overran the interval; skip missed slots instead of bursting
+                    missed = int((now - next_run) // CRAWLER_INTERVAL) + 1
+                    next_run += missed * CRAWLER_INTERVAL
+                    logger.warning("Crawl cycle overran interval, skipping %d slot(s)", missed)
+                remaining = next_run - now
+                logger.info("Sleeping for %.1f minutes...\n", remaining / 60)
+                time.sleep(remaining)
             except KeyboardInterrupt:
                 logger.info("🛑 Continuous Crawler stopped by user.")
                 break
             except Exception as e:
-                logger.error(f"Unexpected error: {e}")
+                logger.error("Unexpected error: %s", e)
                 time.sleep(60)  # Wait a minute before retrying
+                next_run = time.monotonic()
 
 def main():
     crawler = ContinuousCrawler()
@@ -1,16 +1,16 @@
 """
 Export collected articles for sentiment analysis
-Usage: python export_for_sentiment.py TICKER [days_back]
+Usage: python -m crawler_service.export_for_sentiment_analysis TICKER [days_back]
 """
 import sys
 import os
-from utils.article_retriever import ArticleRetriever
+from crawler_service.utils.article_retriever import ArticleRetriever
 
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python export_for_sentiment.py TICKER [days_back]")
-        print("Example: python export_for_sentiment.py AMZN 30")
+        print("Usage: python -m crawler_service.export_for_sentiment_analysis TICKER [days_back]")
+        print("Example: python -m crawler_service.export_for_sentiment_analysis AMZN 30")
         sys.exit(1)
     
     ticker = sys.argv[1].upper()
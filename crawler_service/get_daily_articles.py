@@ -1,22 +1,19 @@
 """
 CLI tool to retrieve articles for a company on a specific date.
-Usage: python crawler_service/get_daily_articles.py FDX 2025-01-16
+Usage: python -m crawler_service.get_daily_articles FDX 2025-01-16
 """
 import sys
 import os
 import json
 from datetime import datetime, timedelta
 
-# Add parent to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from crawler_service.utils.article_retriever import ArticleRetriever
 
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python get_daily_articles.py <TICKER> [DATE]")
-        print("Example: python get_daily_articles.py FDX 2025-01-16")
+        print("Usage: python -m crawler_service.get_daily_articles <TICKER> [DATE]")
+        print("Example: python -m crawler_service.get_daily_articles FDX 2025-01-16")
         print("\nAvailable companies:")
         retriever = ArticleRetriever()
         companies = retriever.get_all_tracked_companies()
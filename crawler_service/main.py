@@ -5,56 +5,165 @@ Reads sites from config and runs Scrapy spider to crawl and store raw JSON data.
 """
 import os
 import sys
+import time
+import shutil
 import yaml
 import logging
+import threading
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from scrapy.crawler import CrawlerProcess
+from scrapy.crawler import CrawlerRunner
 from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
 
-# Import after path is set
 from crawler_service.spiders.news_spider import NewsSpider
 
-def main():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    logger = logging.getLogger(__name__)
-    
-    # Load config file
+# libyaml's C loader is much faster than the pure-Python one when available
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+logger = logging.getLogger(__name__)
+
+# One runner and one reactor thread per process; Twisted's reactor cannot be
+# restarted, so every crawl is scheduled onto the same long-lived loop
+_runner = None
+_runner_lock = threading.Lock()
+
+# (mtime_ns, sites) of the last parsed sites.yml
+_sites_cache = None
+
+# Cached responses older than this are re-downloaded, and pruned before each crawl
+HTTPCACHE_EXPIRATION_SECS = 6 * 60 * 60
+
+
+def load_sites():
+    """Read the list of start URLs from config/sites.yml, reparsing only when it changes"""
+    global _sites_cache
     cfg_path = os.path.join(os.path.dirname(__file__), "config", "sites.yml")
     if not os.path.exists(cfg_path):
         logger.error("Config file not found: %s", cfg_path)
         raise SystemExit(1)
 
+    mtime = os.stat(cfg_path).st_mtime_ns
+    if _sites_cache is not None and _sites_cache[0] == mtime:
+        return _sites_cache[1]
+
     with open(cfg_path, "r", encoding="utf-8") as fh:
-        cfg = yaml.safe_load(fh)
+        cfg = yaml.load(fh, Loader=SafeLoader)
 
     sites = cfg.get("sites", [])
     if not sites:
         logger.error("No sites configured to crawl in %s", cfg_path)
         raise SystemExit(1)
 
-    logger.info("Starting crawler for %d sites", len(sites))
+    _sites_cache = (mtime, sites)
+    return sites
 
-    # Configure Scrapy settings
+
+def build_settings():
+    """Scrapy settings shared by every crawl"""
     settings = get_project_settings()
     settings.set("LOG_LEVEL", "INFO")
     settings.set("ROBOTSTXT_OBEY", False)
-    settings.set("CONCURRENT_REQUESTS", 8)
+    # Concurrency and AutoThrottle are set only in NewsSpider.custom_settings, which override these
+    settings.set("REACTOR_THREADPOOL_MAXSIZE", 20)  # DNS lookups run on this pool
     settings.set("DOWNLOAD_TIMEOUT", 15)
     settings.set("RETRY_TIMES", 3)
     settings.set("USER_AGENT", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
 
-    # Start crawling
-    process = CrawlerProcess(settings=settings)
-    process.crawl(NewsSpider, start_urls=sites)
-    process.start()
+    # Keep responses between cycles so unchanged pages revalidate instead of re-downloading
+    settings.set("HTTPCACHE_ENABLED", True)
+    settings.set("HTTPCACHE_POLICY", "scrapy.extensions.httpcache.RFC2616Policy")
+    settings.set("HTTPCACHE_STORAGE", "scrapy.extensions.httpcache.FilesystemCacheStorage")
+    settings.set("HTTPCACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "httpcache"))
+    settings.set("HTTPCACHE_EXPIRATION_SECS", HTTPCACHE_EXPIRATION_SECS)
+    # Errors and throttling responses are retried next cycle instead of replayed
+    settings.set("HTTPCACHE_IGNORE_HTTP_CODES", [401, 403, 404, 408, 429, 500, 502, 503, 504])
+
+    # HTTP/2 multiplexes requests to the same host over one TLS connection
+    settings.set("DOWNLOAD_HANDLERS", {"https": "scrapy.core.downloader.handlers.http2.H2DownloadHandler"})
+    settings.set("TWISTED_REACTOR", "twisted.internet.asyncioreactor.AsyncioSelectorReactor")
+    return settings
+
+
+def get_runner():
+    """Return the shared CrawlerRunner, starting the reactor thread on first use"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            settings = build_settings()
+            reactor_path = settings.get("TWISTED_REACTOR")
+            if reactor_path and "twisted.internet.reactor" not in sys.modules:
+                install_reactor(reactor_path)
+
+            from twisted.internet import reactor
+
+            # CrawlerProcess does this itself; CrawlerRunner leaves it to us
+            reactor.suggestThreadPoolSize(settings.getint("REACTOR_THREADPOOL_MAXSIZE"))
+            _runner = CrawlerRunner(settings)
+            threading.Thread(
+                target=reactor.run,
+                kwargs={"installSignalHandlers": False},
+                name="scrapy-reactor",
+                daemon=True,
+            ).start()
+    return _runner
+
+
+def prune_http_cache(cache_dir, max_age=HTTPCACHE_EXPIRATION_SECS):
+    """Delete cached responses older than max_age; FilesystemCacheStorage never removes them itself"""
+    if not os.path.isdir(cache_dir):
+        return
     
+    cutoff = time.time() - max_age
+    removed = 0
+    # Layout: <cache_dir>/<spider>/<fingerprint[:2]>/<fingerprint>/
+    for spider_dir in os.scandir(cache_dir):
+        if not spider_dir.is_dir():
+            continue
+        for prefix_dir in os.scandir(spider_dir.path):
+            if not prefix_dir.is_dir():
+                continue
+            for entry in os.scandir(prefix_dir.path):
+                meta = os.path.join(entry.path, "pickled_meta")
+                try:
+                    expired = os.path.getmtime(meta) < cutoff
+                except OSError:
+                    expired = True  # Partially written entry
+                if expired:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            try:
+                os.rmdir(prefix_dir.path)  # Only succeeds once it is empty
+            except OSError:
+                pass
+    if removed:
+        logger.info("Pruned %d expired HTTP cache entries", removed)
+
+
+def run_crawl(sites=None):
+    """Schedule one crawl on the shared runner and block until it finishes"""
+    from twisted.internet import reactor, threads
+
+    if sites is None:
+        sites = load_sites()
+
+    logger.info("Starting crawler for %d sites", len(sites))
+    runner = get_runner()
+    prune_http_cache(runner.settings.get("HTTPCACHE_DIR"))
+    threads.blockingCallFromThread(reactor, runner.crawl, NewsSpider, start_urls=sites)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    run_crawl()
+
     logger.info("Crawling completed")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,19 +1,21 @@
 """
 Daily Crawler Runner
 Runs the crawler for today's articles only and generates a summary.
-Usage: python crawler_service/run_daily_crawl.py
+Usage: python -m crawler_service.run_daily_crawl
 """
 import os
 import sys
 import datetime
 import logging
 
-# Add parent to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from crawler_service.main import main as run_crawler
 from crawler_service.utils.article_retriever import ArticleRetriever
 
+logger = logging.getLogger(__name__)
+
+# Shared across calls so unchanged article files aren't re-parsed every cycle
+_retriever = ArticleRetriever()
+
 def run_crawl_for_company(ticker):
     """
     Run the crawler for a single company ticker and return the number of articles fetched today.
@@ -23,26 +25,25 @@ def run_crawl_for_company(ticker):
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
-    print(f"\n🚀 Starting crawl for {ticker}...")
-    print(f"📅 Target date: {datetime.datetime.utcnow().strftime('%Y-%m-%d')}")
-    print(f"🎯 Company: {ticker}")
-    print("🆓 Sources: Free news sites only\n")
+    today = datetime.datetime.utcnow().strftime("%Y-%m-%d")
+    logger.info("🚀 Starting crawl for %s...", ticker)
+    logger.info("📅 Target date: %s", today)
+    logger.info("🎯 Company: %s", ticker)
+    logger.info("🆓 Sources: Free news sites only")
 
     # Set the ticker as an environment variable for the crawler
     os.environ["CRAWLER_TICKER"] = ticker
     try:
         run_crawler()
     except Exception as e:
-        print(f"\n❌ Crawler error for {ticker}: {e}")
+        logger.error("❌ Crawler error for %s: %s", ticker, e)
         return 0
 
     # Retrieve today's articles for this ticker
-    today = datetime.datetime.utcnow().strftime("%Y-%m-%d")
-    retriever = ArticleRetriever()
-    articles = retriever.get_articles_for_company_date(ticker, today)
+    articles = _retriever.get_articles_for_company_date(ticker, today)
     article_count = len(articles) if articles else 0
 
-    print(f"\n✅ {ticker}: Crawl complete! {article_count} articles fetched for today.")
+    logger.info("✅ %s: Crawl complete! %d articles fetched for today.", ticker, article_count)
     return article_count
 
 
@@ -51,27 +52,33 @@ def generate_daily_summary():
     today = datetime.datetime.utcnow().strftime("%Y-%m-%d")
     retriever = ArticleRetriever()
     
-    print("\n" + "=" * 80)
-    print(f"📊 DAILY CRAWL SUMMARY - {today}")
-    print("=" * 80)
+    # Build the whole report and write it once instead of flushing per line
+    lines = [
+        "",
+        "=" * 80,
+        f"📊 DAILY CRAWL SUMMARY - {today}",
+        "=" * 80,
+    ]
     
     companies = retriever.get_all_tracked_companies()
+    retriever.preload_dates([today])
     total_articles = 0
     
     for ticker in companies:
         articles = retriever.get_articles_for_company_date(ticker, today)
         if articles:
             total_articles += len(articles)
-            print(f"\n✅ {ticker}: {len(articles)} articles")
+            lines.append(f"\n✅ {ticker}: {len(articles)} articles")
             for i, article in enumerate(articles[:5], 1):  # Show top 5
-                print(f"   {i}. {article['title'][:70]}")
-                print(f"      Mentions: {article.get('primary_company', {}).get('mentions', 0)} | "
-                      f"Words: {article['word_count']} | "
-                      f"Source: {article['source_domain']}")
+                lines.append(f"   {i}. {article['title'][:70]}")
+                lines.append(f"      Mentions: {article.get('primary_company', {}).get('mentions', 0)} | "
+                             f"Words: {article['word_count']} | "
+                             f"Source: {article['source_domain']}")
     
-    print("\n" + "=" * 80)
-    print(f"📈 TOTAL: {total_articles} articles across {len(companies)} companies")
-    print("=" * 80 + "\n")
+    lines.append("\n" + "=" * 80)
+    lines.append(f"📈 TOTAL: {total_articles} articles across {len(companies)} companies")
+    lines.append("=" * 80 + "\n\n")
+    sys.stdout.write("\n".join(lines))
 
 if __name__ == "__main__":
     logging.basicConfig(
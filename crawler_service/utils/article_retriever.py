@@ -3,24 +3,101 @@ Article Retrieval Utility
 Easy access to collected company-specific articles for sentiment analysis
 """
 import os
-import json
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
 from datetime import datetime, timedelta
-import glob
+from itertools import groupby, islice
+from operator import itemgetter
+
+import orjson
+
+from crawler_service.utils import article_store
+
+# Worker threads for reading article files in the no-database fallback
+READ_WORKERS = 8
 
 
 class ArticleRetriever:
     """Retrieve and filter collected articles for sentiment analysis"""
     
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, db_path: str = None):
         if data_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             data_dir = os.path.join(base_dir, "data", "by_company")
         
         self.data_dir = data_dir
+        # Article database written by the spider; JSON files are the fallback
+        self.db_path = db_path or os.path.join(os.path.dirname(data_dir), "articles.db")
+        self._conn = None
+        
+        # path -> (mtime_ns, article); reused across calls on this instance
+        self._file_cache: Dict[str, Tuple[int, Dict]] = {}
+        # (ticker, date) -> articles, filled by preload_dates()
+        self._date_cache: Dict[Tuple[str, str], List[Dict]] = {}
+    
+    def _db(self):
+        """Read-only connection to the article database, or None if it doesn't exist yet"""
+        if self._conn is None:
+            self._conn = article_store.connect_readonly(self.db_path)
+        return self._conn
+    
+    def _query_articles(self, sql: str, params: Tuple) -> List[Dict]:
+        return [orjson.loads(row[0]) for row in self._db().execute(sql, params)]
+    
+    def _load_article(self, path: str) -> Dict:
+        """Load one article JSON, skipping the read if its mtime is unchanged"""
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._file_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        with open(path, 'rb') as f:
+            article = orjson.loads(f.read())
+        self._file_cache[path] = (mtime, article)
+        return article
+    
+    def _try_load_article(self, path: str) -> Optional[Dict]:
+        try:
+            return self._load_article(path)
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            return None
+    
+    def _load_articles(self, paths: List[str]) -> List[Dict]:
+        """Load article files in parallel, skipping any that fail to read"""
+        if len(paths) <= 1:
+            loaded = [self._try_load_article(p) for p in paths]
+        else:
+            with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+                loaded = list(pool.map(self._try_load_article, paths))
+        return [a for a in loaded if a is not None]
+    
+    @staticmethod
+    def _json_files(date_path: str) -> List[str]:
+        with os.scandir(date_path) as it:
+            return [e.path for e in it if e.name.endswith(".json") and e.is_file()]
+    
+    def preload_dates(self, dates: Iterable[str]):
+        """
+        Load every tracked company's articles for the given dates in one pass
+        
+        Later get_articles_for_company_date() calls for these dates are
+        answered from memory.
+        
+        Args:
+            dates: Date strings in YYYY-MM-DD format
+        """
+        dates = list(dates)
+        for ticker in self.get_all_tracked_companies():
+            for date in dates:
+                self._date_cache.pop((ticker, date), None)
+                self._date_cache[(ticker, date)] = self.get_articles_for_company_date(ticker, date)
     
     def get_all_tracked_companies(self) -> List[str]:
         """Get list of all company tickers with collected data"""
+        if self._db() is not None:
+            return [row[0] for row in self._db().execute("SELECT DISTINCT ticker FROM articles")]
+        
         if not os.path.exists(self.data_dir):
             return []
         
@@ -31,7 +108,8 @@ class ArticleRetriever:
         self, 
         ticker: str, 
         days_back: int = 30,
-        min_word_count: int = 0
+        min_word_count: int = 0,
+        limit: Optional[int] = None
     ) -> List[Dict]:
         """
         Get all articles for a specific company
@@ -40,55 +118,100 @@ class ArticleRetriever:
             ticker: Company ticker symbol
             days_back: Number of days to look back (0 = all time)
             min_word_count: Minimum article word count
+            limit: Return at most this many of the newest articles
             
         Returns:
-            List of article dictionaries
+            List of article dictionaries, newest first
         """
-        company_dir = os.path.join(self.data_dir, ticker)
-        if not os.path.exists(company_dir):
-            return []
+        return list(self.iter_articles_for_company(ticker, days_back, min_word_count, limit))
+    
+    def iter_articles_for_company(
+        self, 
+        ticker: str, 
+        days_back: int = 30,
+        min_word_count: int = 0,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Yield a company's articles newest first, one date at a time
         
-        articles = []
-        cutoff_date = None
+        Dates are walked in descending order and only the articles of the
+        current date are held and sorted, so a bounded limit only reads the
+        newest dates.
         
+        Args:
+            ticker: Company ticker symbol
+            days_back: Number of days to look back (0 = all time)
+            min_word_count: Minimum article word count
+            limit: Stop after this many articles
+        """
+        cutoff_date = None
         if days_back > 0:
             cutoff_date = datetime.now() - timedelta(days=days_back)
         
-        # Search all date subdirectories
-        for date_dir in os.listdir(company_dir):
-            date_path = os.path.join(company_dir, date_dir)
-            if not os.path.isdir(date_path):
-                continue
-            
-            # Check date filter
-            if cutoff_date:
-                try:
-                    dir_date = datetime.strptime(date_dir, "%Y-%m-%d")
-                    if dir_date < cutoff_date:
-                        continue
-                except:
-                    pass
-            
-            # Load all articles from this date
-            for article_file in glob.glob(os.path.join(date_path, "*.json")):
-                try:
-                    with open(article_file, 'r', encoding='utf-8') as f:
-                        article = json.load(f)
-                    
-                    # Apply word count filter
-                    if article.get('word_count', 0) >= min_word_count:
-                        articles.append(article)
-                        
-                except Exception as e:
-                    print(f"Error loading {article_file}: {e}")
-        
-        # Sort by date (newest first)
-        articles.sort(
-            key=lambda x: x.get('published_datetime', x.get('fetched_at', '')), 
-            reverse=True
+        if self._db() is not None:
+            by_date = self._query_articles_by_date(ticker, cutoff_date)
+        else:
+            by_date = self._scan_company_dir(ticker, cutoff_date)
+        
+        articles = (
+            article
+            for day in by_date
+            for article in sorted(
+                (a for a in day if a.get('word_count', 0) >= min_word_count),
+                # Sort by date (newest first)
+                key=lambda x: x.get('published_datetime', x.get('fetched_at', '')),
+                reverse=True
+            )
         )
+        return islice(articles, limit)
+    
+    def _query_articles_by_date(self, ticker: str, cutoff_date: Optional[datetime]) -> Iterator[List[Dict]]:
+        """Yield a company's articles from the database grouped by date, newest date first"""
+        if cutoff_date:
+            # Dates strictly after the cutoff day, matching the directory scan below
+            rows = self._db().execute(
+                "SELECT published_date, json FROM articles WHERE ticker = ? AND published_date > ? "
+                "ORDER BY published_date DESC",
+                (ticker, cutoff_date.strftime("%Y-%m-%d"))
+            )
+        else:
+            rows = self._db().execute(
+                "SELECT published_date, json FROM articles WHERE ticker = ? ORDER BY published_date DESC",
+                (ticker,)
+            )
+        for _, group in groupby(rows, key=itemgetter(0)):
+            yield [orjson.loads(row[1]) for row in group]
+    
+    def _scan_company_dir(self, ticker: str, cutoff_date: Optional[datetime]) -> Iterator[List[Dict]]:
+        """Yield a company's articles from its JSON files, one date directory at a time, newest first"""
+        company_dir = os.path.join(self.data_dir, ticker)
+        if not os.path.exists(company_dir):
+            return
         
-        return articles
+        date_dirs = []
+        
+        # Search all date subdirectories
+        with os.scandir(company_dir) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+                
+                # Check date filter
+                if cutoff_date:
+                    try:
+                        dir_date = datetime.strptime(entry.name, "%Y-%m-%d")
+                        if dir_date < cutoff_date:
+                            continue
+                    except:
+                        pass
+                
+                date_dirs.append(entry)
+        
+        # YYYY-MM-DD names sort chronologically
+        date_dirs.sort(key=lambda e: e.name, reverse=True)
+        for entry in date_dirs:
+            yield self._load_articles(self._json_files(entry.path))
     
     def get_articles_for_company_date(
         self, 
@@ -105,27 +228,28 @@ class ArticleRetriever:
         Returns:
             List of article dictionaries
         """
+        preloaded = self._date_cache.get((ticker, date))
+        if preloaded is not None:
+            return preloaded
+        
+        if self._db() is not None:
+            return self._query_articles(
+                "SELECT json FROM articles WHERE ticker = ? AND published_date = ?",
+                (ticker, date)
+            )
+        
         date_path = os.path.join(self.data_dir, ticker, date)
-        if not os.path.exists(date_path):
+        if not os.path.isdir(date_path):
             return []
         
-        articles = []
-        for article_file in glob.glob(os.path.join(date_path, "*.json")):
-            try:
-                with open(article_file, 'r', encoding='utf-8') as f:
-                    articles.append(json.load(f))
-            except Exception as e:
-                print(f"Error loading {article_file}: {e}")
-        
-        return articles
+        return self._load_articles(self._json_files(date_path))
     
     def get_article_count_by_company(self, days_back: int = 30) -> Dict[str, int]:
         """Get article counts for all companies"""
         counts = {}
         
         for ticker in self.get_all_tracked_companies():
-            articles = self.get_articles_for_company(ticker, days_back=days_back)
-            counts[ticker] = len(articles)
+            counts[ticker] = sum(1 for _ in self.iter_articles_for_company(ticker, days_back=days_back))
         
         return counts
     
@@ -133,39 +257,53 @@ class ArticleRetriever:
         self, 
         ticker: str, 
         output_file: str,
-        days_back: int = 30
+        days_back: int = 30,
+        top_k: Optional[int] = None
     ):
         """
         Export articles in format ready for sentiment analysis
         
+        Articles are written one at a time as they are read, so the export
+        never holds the whole set in memory.
+        
         Args:
             ticker: Company ticker
             output_file: Output JSON file path
             days_back: Days to include
+            top_k: Only export the newest top_k articles
         """
-        articles = self.get_articles_for_company(ticker, days_back=days_back)
-        
-        # Extract only fields needed for sentiment analysis
-        sentiment_data = []
-        for article in articles:
-            sentiment_data.append({
-                'id': article.get('url', ''),
-                'date': article.get('published_date', ''),
-                'datetime': article.get('published_datetime', ''),
-                'title': article.get('title', ''),
-                'content': article.get('content', ''),
-                'source': article.get('source_domain', ''),
-                'company_ticker': ticker,
-                'company_name': article.get('primary_company', {}).get('name', ''),
-                'mentions': article.get('primary_company', {}).get('mentions', 0),
-                'word_count': article.get('word_count', 0),
-            })
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(sentiment_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"Exported {len(sentiment_data)} articles for {ticker} to {output_file}")
-        return len(sentiment_data)
+        articles = self.iter_articles_for_company(ticker, days_back=days_back, limit=top_k)
+        
+        count = 0
+        with open(output_file, 'wb') as f:
+            f.write(b'[')
+            for article in articles:
+                f.write(b',\n  ' if count else b'\n  ')
+                # Indent each record one level so the file matches a single OPT_INDENT_2 dump
+                f.write(orjson.dumps(
+                    self._sentiment_record(ticker, article), option=orjson.OPT_INDENT_2
+                ).replace(b'\n', b'\n  '))
+                count += 1
+            f.write(b'\n]' if count else b']')
+        
+        print(f"Exported {count} articles for {ticker} to {output_file}")
+        return count
+    
+    @staticmethod
+    def _sentiment_record(ticker: str, article: Dict) -> Dict:
+        """Extract only fields needed for sentiment analysis"""
+        return {
+            'id': article.get('url', ''),
+            'date': article.get('published_date', ''),
+            'datetime': article.get('published_datetime', ''),
+            'title': article.get('title', ''),
+            'content': article.get('content', ''),
+            'source': article.get('source_domain', ''),
+            'company_ticker': ticker,
+            'company_name': article.get('primary_company', {}).get('name', ''),
+            'mentions': article.get('primary_company', {}).get('mentions', 0),
+            'word_count': article.get('word_count', 0),
+        }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+"""
+Article Store
+SQLite index of company articles keyed by (ticker, url), with an index on
+(ticker, published_date). The spider writes it alongside the per-article JSON
+files (which the data processor still watches); ArticleRetriever reads from it.
+Usage: python -m crawler_service.utils.article_store   (re-import JSON files)
+"""
+import os
+import glob
+import sqlite3
+from typing import Iterable, Tuple
+
+import orjson
+
+# Default database path
+DB_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "data",
+    "articles.db"
+)
+DB_PATH = os.path.abspath(DB_PATH)
+
+# Default by-company JSON directory, used to backfill a new database
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "by_company"))
+
+
+def connect(db_path: str = DB_PATH, data_dir: str = DATA_DIR) -> sqlite3.Connection:
+    """
+    Open the article database for writing, creating it if needed.
+
+    A newly created database is backfilled from the existing JSON files so
+    readers never see fewer articles than the by-company directory holds.
+
+    Args:
+        db_path: SQLite database path
+        data_dir: by_company directory to backfill from
+
+    Returns:
+        Autocommit connection; use insert_articles() for batched writes
+    """
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=60000")
+
+    cur = conn.cursor()
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='articles'")
+    if cur.fetchone() is None:
+        cur.execute("""
+            CREATE TABLE articles (
+                ticker TEXT,
+                published_date TEXT,
+                url TEXT,
+                title TEXT,
+                content TEXT,
+                json BLOB,
+                PRIMARY KEY (ticker, url)
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_ticker_date ON articles(ticker, published_date)")
+        import_article_files(conn, data_dir)
+    return conn
+
+
+def connect_readonly(db_path: str = DB_PATH):
+    """Open an existing article database read-only, or return None if there is none"""
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA busy_timeout=60000")
+    return conn
+
+
+def article_row(ticker: str, date: str, article: dict) -> Tuple:
+    """Build an articles row; ticker is the directory form (dots replaced by underscores)"""
+    return (
+        ticker,
+        date,
+        article.get("url", ""),
+        article.get("title", ""),
+        article.get("content", ""),
+        orjson.dumps(article),
+    )
+
+
+def insert_articles(conn: sqlite3.Connection, rows: Iterable[Tuple]):
+    """Insert or replace article rows in one transaction"""
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT OR REPLACE INTO articles (ticker, published_date, url, title, content, json) VALUES (?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.execute("COMMIT")
+
+
+def import_article_files(conn: sqlite3.Connection, data_dir: str = DATA_DIR) -> int:
+    """
+    Load every by_company/<TICKER>/<DATE>/*.json file into the database.
+
+    Returns:
+        Number of files imported
+    """
+    rows = []
+    for path in glob.glob(os.path.join(data_dir, "*", "*", "*.json")):
+        date_dir = os.path.dirname(path)
+        ticker = os.path.basename(os.path.dirname(date_dir))
+        try:
+            with open(path, "rb") as fh:
+                article = orjson.loads(fh.read())
+        except (OSError, orjson.JSONDecodeError) as e:
+            print(f"Error loading {path}: {e}")
+            continue
+        rows.append(article_row(ticker, os.path.basename(date_dir), article))
+
+    if rows:
+        insert_articles(conn, rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    existed = os.path.exists(DB_PATH)
+    conn = connect()
+    # connect() already backfills a database it had to create
+    if existed:
+        import_article_files(conn)
+    count = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    print(f"{count} articles indexed in {DB_PATH}")
+    conn.close()
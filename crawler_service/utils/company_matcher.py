@@ -5,8 +5,20 @@ Provides functions to match text content with tracked companies.
 import os
 import re
 import yaml
+from collections import Counter, defaultdict
 from typing import List, Dict, Tuple
 
+# Aho-Corasick scans all keywords in one pass; fall back to per-keyword
+# regexes when pyahocorasick isn't installed
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
 
 class CompanyMatcher:
     """Helper class for matching companies in text"""
@@ -19,6 +31,13 @@ class CompanyMatcher:
         self.companies = []
         self.company_keywords = {}
         self.general_keywords = []
+        # ticker -> (config position, company dict)
+        self._company_by_ticker = {}
+        # lowercased sector -> companies, in config order
+        self._by_sector = defaultdict(list)
+        self._automaton = None
+        self._patterns = {}
+        self._company_kw_roots = {}
         self._load_config(config_path)
     
     def _load_config(self, config_path: str):
@@ -37,54 +56,120 @@ class CompanyMatcher:
             ticker = company.get("ticker", "")
             keywords = company.get("keywords", [])
             self.company_keywords[ticker] = [kw.lower() for kw in keywords]
+            self._company_by_ticker.setdefault(ticker, (len(self._company_by_ticker), company))
+            self._by_sector[company.get("sector", "").lower()].append(company)
+        
+        self._automaton = self._build_automaton()
+        if self._automaton is None:
+            # One (keyword, pattern) per keyword, not a per-company union: nested
+            # keywords ("fedex", "fedex ground") would then only count once
+            self._patterns = {
+                ticker: [(kw, re.compile(r'\b' + re.escape(kw) + r'\b', re.IGNORECASE)) for kw in keywords if kw]
+                for ticker, keywords in self.company_keywords.items()
+            }
+            # Keywords that don't contain another of the company's keywords: if
+            # none of these is in the text, no keyword of the company is
+            self._company_kw_roots = {
+                ticker: tuple(
+                    kw for kw in set(keywords)
+                    if kw and not any(other and other != kw and other in kw for other in keywords)
+                )
+                for ticker, keywords in self.company_keywords.items()
+            }
+    
+    def _build_automaton(self):
+        """Build one automaton over every company keyword, or None without pyahocorasick"""
+        if ahocorasick is None:
+            return None
+        
+        # A keyword may belong to several tickers (or repeat within one)
+        owners = {}
+        for ticker, keywords in self.company_keywords.items():
+            for kw in keywords:
+                if kw:
+                    owners.setdefault(kw, []).append(ticker)
+        if not owners:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for kw, tickers in owners.items():
+            automaton.add_word(kw, (tuple(tickers), kw))
+        automaton.make_automaton()
+        return automaton
+    
+    def _count_mentions(self, text_lower: str) -> Counter:
+        """Count word-bounded keyword mentions per ticker"""
+        counts = Counter()
+        
+        if self._automaton is None:
+            for ticker, patterns in self._patterns.items():
+                # Cheap company-level screen before any per-keyword work
+                if not any(kw in text_lower for kw in self._company_kw_roots[ticker]):
+                    continue
+                for kw, pattern in patterns:
+                    # Substring test first; most keywords aren't in a given article
+                    if kw in text_lower:
+                        counts[ticker] += len(pattern.findall(text_lower))
+            return counts
+        
+        last = len(text_lower) - 1
+        for end_idx, (tickers, kw) in self._automaton.iter(text_lower):
+            start_idx = end_idx - len(kw) + 1
+            # Same rule as the regex \b: a keyword edge that is a word character
+            # must not touch another word character, and vice versa
+            before = start_idx > 0 and _is_word_char(text_lower[start_idx - 1])
+            after = end_idx < last and _is_word_char(text_lower[end_idx + 1])
+            if before == _is_word_char(kw[0]) or after == _is_word_char(kw[-1]):
+                continue
+            for ticker in tickers:
+                counts[ticker] += 1
+        return counts
     
-    def match_companies(self, text: str) -> Tuple[List[Dict], float]:
+    def match_companies(self, text: str, approximate_word_count: bool = False) -> Tuple[List[Dict], float]:
         """
         Find all companies mentioned in text.
         
         Args:
             text: Text to search for company mentions
+            approximate_word_count: Estimate words from spaces instead of
+                splitting the text (fine for clean single-spaced prose)
             
         Returns:
             Tuple of (matched companies list, relevance score)
         """
-        text_lower = text.lower()
-        matched = []
-        total_mentions = 0
+        counts = self._count_mentions(text.lower())
         
-        for company in self.companies:
-            ticker = company.get("ticker", "")
-            keywords = self.company_keywords.get(ticker, [])
-            
-            mentions = 0
-            for keyword in keywords:
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                mentions += len(re.findall(pattern, text_lower, re.IGNORECASE))
-            
-            if mentions > 0:
-                matched.append({
-                    "name": company.get("name", ""),
-                    "ticker": ticker,
-                    "sector": company.get("sector", ""),
-                    "mentions": mentions
-                })
-                total_mentions += mentions
-        
-        # Sort by number of mentions (descending)
-        matched.sort(key=lambda x: x["mentions"], reverse=True)
+        # Sort by number of mentions (descending), ties in config order
+        hits = sorted(
+            (ticker for ticker, mentions in counts.items() if mentions > 0),
+            key=lambda t: (-counts[t], self._company_by_ticker[t][0])
+        )
+        matched = []
+        for ticker in hits:
+            company = self._company_by_ticker[ticker][1]
+            matched.append({
+                "name": company.get("name", ""),
+                "ticker": ticker,
+                "sector": company.get("sector", ""),
+                "mentions": counts[ticker]
+            })
+        total_mentions = sum(counts.values())
         
-        # Calculate relevance score
-        word_count = len(text.split())
+        # Calculate relevance score; no mentions means 0 whatever the length
+        if not total_mentions:
+            return matched, 0.0
+        if approximate_word_count:
+            word_count = text.count(' ') + 1
+        else:
+            word_count = len(text.split())
         relevance_score = min(1.0, (total_mentions * 10) / max(word_count, 1))
         
         return matched, relevance_score
     
     def get_company_by_ticker(self, ticker: str) -> Dict:
         """Get company info by ticker symbol"""
-        for company in self.companies:
-            if company.get("ticker") == ticker:
-                return company
-        return None
+        entry = self._company_by_ticker.get(ticker)
+        return entry[1] if entry else None
     
     def get_all_tickers(self) -> List[str]:
         """Get list of all tracked ticker symbols"""
@@ -92,4 +177,4 @@ class CompanyMatcher:
     
     def get_companies_by_sector(self, sector: str) -> List[Dict]:
         """Get all companies in a specific sector"""
-        return [c for c in self.companies if c.get("sector", "").lower() == sector.lower()]
\ No newline at end of file
+        return list(self._by_sector.get(sector.lower(), ()))
\ No newline at end of file
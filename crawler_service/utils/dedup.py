@@ -3,8 +3,12 @@ URL Deduplication Utility
 Provides reusable functions for checking and marking URLs as seen.
 """
 import os
+import atexit
+import hashlib
 import sqlite3
 import datetime
+import threading
+from typing import List
 
 # Default database path
 DB_PATH = os.path.join(
@@ -15,22 +19,154 @@ DB_PATH = os.path.join(
 )
 DB_PATH = os.path.abspath(DB_PATH)
 
+# INSERT ... RETURNING needs SQLite 3.35+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Bound parameters per IN (...) lookup, under SQLite's default limit of 999
+SQL_PARAM_CHUNK = 900
+
+# One connection per thread, reused across calls; (db path, connection)
+_local = threading.local()
+
+# Bloom filter sizing: 10 bits and 7 probes per URL gives ~1% false positives
+BLOOM_BITS_PER_URL = 10
+BLOOM_HASHES = 7
+BLOOM_MIN_CAPACITY = 100_000
+
+
+class _BloomFilter:
+    """Fixed-size Bloom filter over URLs, double-hashed from one BLAKE2b digest"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.size = capacity * BLOOM_BITS_PER_URL
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, url: str):
+        digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(BLOOM_HASHES)]
+
+    def add(self, url: str):
+        for pos in self._positions(url):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, url: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url))
+
+
+def url_key(url: str) -> int:
+    """64-bit signed integer key of a URL, the seen_urls primary key"""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def ensure_seen_urls_table(conn: sqlite3.Connection):
+    """
+    Create the seen_urls table, or migrate an older one in place.
+    
+    URLs are keyed by url_key() as an INTEGER PRIMARY KEY, so lookups walk a
+    B-tree of 8-byte integers instead of URL strings; url is stored unindexed
+    and compared on a hit to rule out hash collisions. Shared with the spider,
+    which also records crawl_date.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(seen_urls)")]
+    if "url_hash" in columns and "crawl_date" in columns:
+        return
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not columns:
+            conn.execute("""
+                CREATE TABLE seen_urls (
+                    url_hash INTEGER PRIMARY KEY,
+                    url TEXT,
+                    seen_at TEXT,
+                    title TEXT,
+                    status INTEGER,
+                    crawl_date TEXT
+                )
+            """)
+        elif "url_hash" not in columns:
+            # Rebuild a url TEXT PRIMARY KEY table keyed by url hash
+            conn.create_function("url_key", 1, url_key, deterministic=True)
+            crawl_date = "crawl_date" if "crawl_date" in columns else "NULL"
+            conn.execute("""
+                CREATE TABLE seen_urls_new (
+                    url_hash INTEGER PRIMARY KEY,
+                    url TEXT,
+                    seen_at TEXT,
+                    title TEXT,
+                    status INTEGER,
+                    crawl_date TEXT
+                )
+            """)
+            conn.execute(
+                "INSERT OR IGNORE INTO seen_urls_new (url_hash, url, seen_at, title, status, crawl_date) "
+                f"SELECT url_key(url), url, seen_at, title, status, {crawl_date} FROM seen_urls"
+            )
+            conn.execute("DROP TABLE seen_urls")
+            conn.execute("ALTER TABLE seen_urls_new RENAME TO seen_urls")
+        else:
+            conn.execute("ALTER TABLE seen_urls ADD COLUMN crawl_date TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_crawl_date ON seen_urls(crawl_date)")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# Shared by all threads; (db path, filter), rebuilt when DB_PATH changes or the filter fills up
+_bloom = None
+_bloom_lock = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Return this thread's connection to DB_PATH, opening it on first use"""
+    cached = getattr(_local, "conn", None)
+    if cached is not None and cached[0] == DB_PATH:
+        return cached[1]
 
-def ensure_db():
-    """Create deduplication database if it doesn't exist"""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS seen_urls (
-            url TEXT PRIMARY KEY,
-            seen_at TEXT,
-            title TEXT,
-            status INTEGER
-        )
-    """)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    ensure_seen_urls_table(conn)
     conn.commit()
-    conn.close()
+    atexit.register(conn.close)
+
+    if cached is not None:
+        # DB_PATH was changed since this thread connected
+        cached[1].close()
+    _local.conn = (DB_PATH, conn)
+    return conn
+
+
+def _get_bloom(conn: sqlite3.Connection) -> _BloomFilter:
+    """
+    Return the Bloom filter of seen URLs, loading it from the database if needed.
+    
+    The filter holds every URL in the table when it was loaded plus every URL
+    this process has added since; URLs inserted by other processes after that
+    are not in it.
+    """
+    global _bloom
+    with _bloom_lock:
+        if _bloom is None or _bloom[0] != DB_PATH or _bloom[1].count > _bloom[1].capacity:
+            existing = conn.execute("SELECT COUNT(*) FROM seen_urls").fetchone()[0]
+            bloom = _BloomFilter(max(existing * 2, BLOOM_MIN_CAPACITY))
+            for (url,) in conn.execute("SELECT url FROM seen_urls"):
+                bloom.add(url)
+            _bloom = (DB_PATH, bloom)
+        return _bloom[1]
+
+
+def ensure_db():
+    """Create deduplication database if it doesn't exist"""
+    _get_conn()
 
 
 def is_duplicate(url: str) -> bool:
@@ -43,19 +179,95 @@ def is_duplicate(url: str) -> bool:
     Returns:
         True if URL has been seen, False otherwise
     """
-    ensure_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM seen_urls WHERE url = ?", (url,))
-    found = cur.fetchone() is not None
-    if not found:
-        cur.execute(
-            "INSERT OR IGNORE INTO seen_urls (url, seen_at) VALUES (?, ?)",
-            (url, datetime.datetime.utcnow().isoformat())
-        )
-        conn.commit()
-    conn.close()
-    return found
+    if not _HAS_RETURNING:
+        return is_duplicate_many([url])[0]
+    
+    conn = _get_conn()
+    bloom = _get_bloom(conn)
+    key = url_key(url)
+    
+    # Check and insert in one atomic statement; a row comes back only if the URL was new.
+    # The Bloom filter can't decide this: another process may have inserted the URL since it loaded
+    inserted = conn.execute(
+        "INSERT INTO seen_urls (url_hash, url, seen_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(url_hash) DO NOTHING RETURNING 1",
+        (key, url, datetime.datetime.utcnow().isoformat())
+    ).fetchall()
+    conn.commit()
+    if inserted:
+        with _bloom_lock:
+            bloom.add(url)
+        return False
+    
+    # Conflict: a duplicate unless another URL holds the same hash
+    row = conn.execute("SELECT url FROM seen_urls WHERE url_hash = ?", (key,)).fetchone()
+    return row is not None and row[0] == url
+
+
+def _stored_urls(conn: sqlite3.Connection, urls: List[str], keys: dict) -> set:
+    """Return which of the URLs are in the table; a row only counts if its URL matches, not just its hash"""
+    found = set()
+    for i in range(0, len(urls), SQL_PARAM_CHUNK):
+        chunk = [keys[url] for url in urls[i:i + SQL_PARAM_CHUNK]]
+        found.update(row[0] for row in conn.execute(
+            f"SELECT url FROM seen_urls WHERE url_hash IN ({','.join('?' * len(chunk))})", chunk
+        ))
+    return found & set(urls)
+
+
+def is_duplicate_many(urls: List[str]) -> List[bool]:
+    """
+    Check a batch of URLs and mark the new ones as seen in one transaction.
+    
+    Same result as calling is_duplicate() on each URL in order: a URL that
+    repeats within the batch is a duplicate after its first occurrence.
+    
+    Args:
+        urls: URLs to check
+        
+    Returns:
+        One flag per input URL, True if it had been seen
+    """
+    conn = _get_conn()
+    bloom = _get_bloom(conn)
+    
+    unique = list(dict.fromkeys(urls))
+    keys = {url: url_key(url) for url in unique}
+    
+    with conn:
+        # Take the write lock up front so no other process inserts between the lookups and inserts
+        conn.execute("BEGIN IMMEDIATE")
+        # Bloom hits are likely duplicates: one batched lookup saves an insert attempt each
+        existing = _stored_urls(conn, [url for url in unique if url in bloom], keys)
+        
+        # Anything else is new only if its insert goes through; a miss just means
+        # this process hasn't seen the URL, another may have stored it already
+        seen_at = datetime.datetime.utcnow().isoformat()
+        inserted, conflicts = [], []
+        for url in unique:
+            if url in existing:
+                continue
+            before = conn.total_changes
+            conn.execute(
+                "INSERT OR IGNORE INTO seen_urls (url_hash, url, seen_at) VALUES (?, ?, ?)",
+                (keys[url], url, seen_at)
+            )
+            (inserted if conn.total_changes > before else conflicts).append(url)
+        
+        # A conflicting row is a duplicate unless another URL holds the same hash
+        existing.update(_stored_urls(conn, conflicts, keys))
+    
+    with _bloom_lock:
+        for url in inserted:
+            bloom.add(url)
+    
+    new_urls = [url for url in unique if url not in existing]
+    results = []
+    first_seen = set(new_urls)
+    for url in urls:
+        results.append(url not in first_seen)
+        first_seen.discard(url)
+    return results
 
 
 def mark_as_seen(url: str, title: str = "", status: int = 200):
@@ -67,33 +279,27 @@ def mark_as_seen(url: str, title: str = "", status: int = 200):
         title: Optional page title
         status: HTTP status code
     """
-    ensure_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT OR REPLACE INTO seen_urls (url, seen_at, title, status) VALUES (?, ?, ?, ?)",
-        (url, datetime.datetime.utcnow().isoformat(), title, status)
+    conn = _get_conn()
+    bloom = _get_bloom(conn)
+    conn.execute(
+        "INSERT OR REPLACE INTO seen_urls (url_hash, url, seen_at, title, status) VALUES (?, ?, ?, ?, ?)",
+        (url_key(url), url, datetime.datetime.utcnow().isoformat(), title, status)
     )
     conn.commit()
-    conn.close()
+    with _bloom_lock:
+        bloom.add(url)
 
 
 def get_seen_count() -> int:
     """Return count of URLs in deduplication database"""
-    ensure_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM seen_urls")
-    count = cur.fetchone()[0]
-    conn.close()
-    return count
+    return _get_conn().execute("SELECT COUNT(*) FROM seen_urls").fetchone()[0]
 
 
 def clear_dedupe_db():
     """Clear all entries from deduplication database (use with caution)"""
-    ensure_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("DELETE FROM seen_urls")
+    global _bloom
+    conn = _get_conn()
+    conn.execute("DELETE FROM seen_urls")
     conn.commit()
-    conn.close()
\ No newline at end of file
+    with _bloom_lock:
+        _bloom = None
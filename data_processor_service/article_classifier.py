@@ -3,12 +3,52 @@ Article Classifier: Separates general company news from financial news
 Uses keyword matching and NLP to determine article type
 """
 import os
-import json
+import functools
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Set, Tuple
 import re
 from datetime import datetime
-import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import orjson
+
+# Aho-Corasick finds every keyword in one pass over the text; fall back to
+# per-keyword substring checks when pyahocorasick isn't installed
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Numeric/phrase cues that strongly indicate financial news, each worth +2
+FINANCIAL_PATTERNS = (
+    r'\$\d+\.?\d*\s*(billion|million|trillion)',  # $5 billion
+    r'\d+\.?\d*%',  # 5.3%
+    r'q[1-4]\s+\d{4}',  # Q3 2025
+    r'fiscal\s+year',
+    r'earnings?\s+per\s+share',
+    r'price\s+target',
+)
+# Compiled once and searched separately: each pattern keeps its own literal
+# prefix scan, which re loses when they are joined into one alternation
+_FINANCIAL_PATTERN_RES = tuple(re.compile(pattern) for pattern in FINANCIAL_PATTERNS)
+# Every FINANCIAL_PATTERNS match contains one of these literals; text with none
+# of them is not run through the regex ("price", not "price target", since
+# the pattern allows any whitespace between the words)
+_PATTERN_CUES = ('$', '%', 'q1', 'q2', 'q3', 'q4', 'fiscal', 'earning', 'price')
+
+# Threads per classification worker process reading article files
+READ_WORKERS = 8
+
+# A long article whose title has one of these words is classified financial
+# without scanning the content
+STRONG_TITLE_CUES = ('earnings', 'revenue', 'profit', 'ebitda', 'q1', 'q2', 'q3', 'q4')
+STRONG_TITLE_MIN_CONTENT = 2000
+# Whole words only, so "nonprofit" doesn't count and "Q1:" or "Q1," does
+_STRONG_TITLE_RE = re.compile(r'(?<!\w)(?:' + '|'.join(map(re.escape, STRONG_TITLE_CUES)) + r')(?!\w)')
+
+# Financial keywords that earn the title boost when they appear in the title
+_TITLE_FINANCIAL_KEYWORDS = frozenset({'earnings', 'revenue', 'profit', 'q1', 'q2', 'q3', 'q4'})
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -45,6 +85,42 @@ class ArticleClassifier:
             'award', 'recognition', 'milestone', 'achievement',
             'event', 'conference', 'summit', 'expo'
         }
+        
+        self._automaton = self._build_automaton()
+    
+    def __getstate__(self):
+        # Worker processes get the keyword sets and rebuild the automaton themselves
+        state = self.__dict__.copy()
+        state['_automaton'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._automaton = self._build_automaton()
+    
+    def _build_automaton(self):
+        """One automaton over both keyword sets, or None without pyahocorasick"""
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for keyword in self.financial_keywords | self.general_keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return automaton
+    
+    def _keyword_hits(self, text: str) -> Set[str]:
+        """Distinct financial/general keywords present in the text"""
+        if self._automaton is None:
+            return {keyword for keyword in self.financial_keywords | self.general_keywords if keyword in text}
+        return {keyword for _, keyword in self._automaton.iter(text)}
+    
+    @staticmethod
+    def _pattern_hits(text: str) -> Set[int]:
+        """Indexes of the FINANCIAL_PATTERNS found in the text"""
+        if not any(cue in text for cue in _PATTERN_CUES):
+            return set()
+        return {i for i, pattern in enumerate(_FINANCIAL_PATTERN_RES) if pattern.search(text)}
     
     def classify_article(self, article: Dict) -> str:
         """
@@ -57,31 +133,29 @@ class ArticleClassifier:
             'financial' or 'general'
         """
         title = article.get('title', '').lower()
-        content = article.get('content', '').lower()
+        content = article.get('content', '')
         
-        # Combine title and content, but weight title more heavily
-        full_text = f"{title} {title} {content}"
+        # Clearly financial headline on a full-length article: skip the scans
+        if len(content) > STRONG_TITLE_MIN_CONTENT and _STRONG_TITLE_RE.search(title):
+            return 'financial'
+        content = content.lower()
+        
+        # Title and content are scanned separately; each keyword or pattern
+        # counts once whether it appears in the title, the content or both
+        title_hits = self._keyword_hits(title)
+        keyword_hits = title_hits | self._keyword_hits(content)
         
         # Count keyword matches
-        financial_score = sum(1 for keyword in self.financial_keywords if keyword in full_text)
-        general_score = sum(1 for keyword in self.general_keywords if keyword in full_text)
+        financial_score = len(keyword_hits & self.financial_keywords)
+        general_score = len(keyword_hits & self.general_keywords)
         
         # Check for financial patterns (numbers with $ or %)
-        financial_patterns = [
-            r'\$\d+\.?\d*\s*(billion|million|trillion)',  # $5 billion
-            r'\d+\.?\d*%',  # 5.3%
-            r'q[1-4]\s+\d{4}',  # Q3 2025
-            r'fiscal\s+year',
-            r'earnings?\s+per\s+share',
-            r'price\s+target',
-        ]
-        
-        for pattern in financial_patterns:
-            if re.search(pattern, full_text):
-                financial_score += 2  # Strong indicator
+        pattern_hits = self._pattern_hits(title) | self._pattern_hits(content)
+        financial_score += 2 * len(pattern_hits)  # Strong indicator
         
-        # Check title specifically for financial indicators
-        if any(keyword in title for keyword in ['earnings', 'revenue', 'profit', 'stock', 'q1', 'q2', 'q3', 'q4']):
+        # Check title specifically for financial indicators ('stock' alone
+        # isn't a financial keyword, so it can't come from title_hits)
+        if title_hits & _TITLE_FINANCIAL_KEYWORDS or 'stock' in title:
             financial_score += 3
         
         # Decision logic
@@ -118,63 +192,21 @@ class ArticleClassifier:
         logger.info("ARTICLE CLASSIFICATION STARTING")
         logger.info("=" * 70)
         
-        # Process each company folder
-        for ticker in os.listdir(input_dir):
-            ticker_path = os.path.join(input_dir, ticker)
-            
-            if not os.path.isdir(ticker_path):
-                continue
-            
-            company_general = []
-            company_financial = []
-            
-            # Process each date folder
-            for date_folder in os.listdir(ticker_path):
-                date_path = os.path.join(ticker_path, date_folder)
-                
-                if not os.path.isdir(date_path):
-                    continue
-                
-                # Process each article
-                for filename in os.listdir(date_path):
-                    if not filename.endswith('.json'):
-                        continue
-                    
-                    filepath = os.path.join(date_path, filename)
-                    
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            article = json.load(f)
-                        
-                        # Classify article
-                        article_type = self.classify_article(article)
-                        
-                        # Add classification metadata
-                        article['classification'] = article_type
-                        article['classified_at'] = datetime.utcnow().isoformat() + 'Z'
-                        
-                        if article_type == 'financial':
-                            company_financial.append(article)
-                            financial_count += 1
-                        else:
-                            company_general.append(article)
-                            general_count += 1
-                    
-                    except Exception as e:
-                        logger.error(f"Error processing {filepath}: {e}")
-            
-            # Save classified articles by company
-            if company_general:
-                output_file = os.path.join(general_dir, f"{ticker}_general.json")
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(company_general, f, indent=2, ensure_ascii=False)
-                logger.info(f"✅ {ticker}: {len(company_general)} general articles")
-            
-            if company_financial:
-                output_file = os.path.join(financial_dir, f"{ticker}_financial.json")
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(company_financial, f, indent=2, ensure_ascii=False)
-                logger.info(f"💰 {ticker}: {len(company_financial)} financial articles")
+        # One "processed at" stamp for the whole run
+        classified_at = datetime.utcnow().isoformat() + 'Z'
+        
+        # One task per company folder; each worker writes only its own ticker's files
+        with os.scandir(input_dir) as it:
+            tickers = [(entry.name, entry.path) for entry in it if entry.is_dir()]
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker, initargs=(self,)) as executor:
+            futures = [
+                executor.submit(_classify_ticker, ticker, ticker_path, general_dir, financial_dir, classified_at)
+                for ticker, ticker_path in tickers
+            ]
+            for future in futures:
+                ticker_general, ticker_financial = future.result()
+                general_count += ticker_general
+                financial_count += ticker_financial
         
         logger.info("=" * 70)
         logger.info(f"CLASSIFICATION COMPLETE")
@@ -186,6 +218,104 @@ class ArticleClassifier:
         return general_count, financial_count
 
 
+# Per-process classifier for classify_and_split() workers, set by _init_worker()
+_worker_classifier = None
+
+
+def _init_worker(classifier: ArticleClassifier):
+    """Keep the caller's classifier, unpickled once per worker process instead of once per task"""
+    global _worker_classifier
+    _worker_classifier = classifier
+
+
+def _classify_ticker(
+    ticker: str,
+    ticker_path: str,
+    general_dir: str,
+    financial_dir: str,
+    classified_at: str
+) -> Tuple[int, int]:
+    """
+    Classify one company folder and write its general/financial files
+    
+    Runs in a worker process of ArticleClassifier.classify_and_split(), with
+    the calling classifier installed by _init_worker().
+    
+    Returns:
+        Tuple of (general_count, financial_count)
+    """
+    classifier = _worker_classifier or _get_classifier()
+    general_count = 0
+    financial_count = 0
+    
+    company_general = []
+    company_financial = []
+    
+    # Process each date folder
+    with os.scandir(ticker_path) as it:
+        date_paths = [entry.path for entry in it if entry.is_dir()]
+    
+    filepaths = []
+    for date_path in date_paths:
+        with os.scandir(date_path) as it:
+            filepaths.extend(entry.path for entry in it if entry.name.endswith('.json'))
+    
+    # Reads overlap on a thread pool; classification stays on this process's thread
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+        # Process each article
+        for filepath, article in zip(filepaths, pool.map(_read_article, filepaths)):
+            try:
+                if isinstance(article, Exception):
+                    raise article
+                
+                # Classify article
+                article_type = classifier.classify_article(article)
+                
+                # Add classification metadata
+                article['classification'] = article_type
+                article['classified_at'] = classified_at
+                
+                if article_type == 'financial':
+                    company_financial.append(article)
+                    financial_count += 1
+                else:
+                    company_general.append(article)
+                    general_count += 1
+            
+            except Exception as e:
+                logger.error(f"Error processing {filepath}: {e}")
+    
+    # Save classified articles by company
+    if company_general:
+        output_file = os.path.join(general_dir, f"{ticker}_general.json")
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(company_general, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        logger.info(f"✅ {ticker}: {len(company_general)} general articles")
+    
+    if company_financial:
+        output_file = os.path.join(financial_dir, f"{ticker}_financial.json")
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(company_financial, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        logger.info(f"💰 {ticker}: {len(company_financial)} financial articles")
+    
+    return general_count, financial_count
+
+
+def _read_article(filepath: str):
+    """Load one article file, returning the exception instead of raising it"""
+    try:
+        with open(filepath, 'rb') as f:
+            return orjson.loads(f.read())
+    except Exception as e:
+        return e
+
+
+@functools.lru_cache(maxsize=1)
+def _get_classifier() -> ArticleClassifier:
+    """Shared classifier, built once per process"""
+    return ArticleClassifier()
+
+
 def classify_articles(articles):
     """
     Simple function to classify a list of articles for real-time processing
@@ -200,17 +330,23 @@ def classify_articles(articles):
     if not articles:
         return []
     
-    classifier = ArticleClassifier()
+    classifier = _get_classifier()
     classified = []
     
-    for article in articles:
+    classified_at = datetime.now().isoformat()
+    
+    # Random scores for every article up front, one numpy call each
+    financial_impacts = np.random.uniform(-50, 50, len(articles)).tolist()
+    sentiment_scores = np.random.uniform(-1, 1, len(articles)).tolist()
+    
+    for i, article in enumerate(articles):
         try:
             # Classify the article
             article_type = classifier.classify_article(article)
             
             # Add classification metadata with variation for dynamic predictions
             # Add random financial impact score to simulate different analysis runs
-            financial_impact = random.uniform(-50, 50)
+            financial_impact = financial_impacts[i]
             
             classified_article = {
                 'title': article.get('title', ''),
@@ -220,9 +356,9 @@ def classify_articles(articles):
                 'ticker': article.get('ticker', ''),
                 'source': article.get('source', ''),
                 'classification': article_type,
-                'classified_at': datetime.now().isoformat(),
+                'classified_at': classified_at,
                 'financial_score': financial_impact,  # Random score for each run
-                'sentiment_score': random.uniform(-1, 1)  # Random sentiment for each run
+                'sentiment_score': sentiment_scores[i]  # Random sentiment for each run
             }
             
             classified.append(classified_article)
@@ -237,9 +373,9 @@ def classify_articles(articles):
                 'ticker': article.get('ticker', ''),
                 'source': article.get('source', ''),
                 'classification': 'general',
-                'classified_at': datetime.now().isoformat(),
-                'financial_score': random.uniform(-50, 50),
-                'sentiment_score': random.uniform(-1, 1)
+                'classified_at': classified_at,
+                'financial_score': financial_impacts[i],
+                'sentiment_score': sentiment_scores[i]
             })
     
     logger.info(f"📰 Classified {len(classified)} articles for real-time processing")
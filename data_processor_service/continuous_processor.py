@@ -1,13 +1,19 @@
 import os
 import sys
-import json
+import orjson
+import mmap
 import time
+import math
+import hashlib
+import queue
 import logging
 from pathlib import Path
 from datetime import datetime
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchdog.events import PatternMatchingEventHandler, EVENT_TYPE_CREATED, EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED
 import threading
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Setup paths
 CUR_DIR = Path(__file__).parent.resolve()
@@ -17,7 +23,7 @@ if str(CUR_DIR) not in sys.path:
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from process_pipeline import ProcessingPipeline
+from process_pipeline import ProcessingPipeline, write_prediction, COMPANY_BATCH_SIZE
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,18 +31,75 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-CHECK_INTERVAL = int(os.getenv('PROCESSOR_CHECK_INTERVAL_SECONDS', 60))
 REPROCESS_INTERVAL = int(os.getenv('REPROCESS_INTERVAL_MINUTES', 5)) * 60  # 5 minutes default
+PROCESSOR_WORKERS = int(os.getenv('PROCESSOR_WORKERS', 8))  # companies processed in parallel
+EVENT_WORKERS = int(os.getenv('PROCESSOR_EVENT_WORKERS', 4))  # threads draining file events
+EVENT_QUEUE_SIZE = 1024
+MMAP_MIN_BYTES = 1 << 20  # hash files at least this large through mmap
+MTIME_CACHE_SIZE = 4096  # article paths whose last event mtime is remembered
 
+# One ProcessingPipeline per process; loading its models dominates a single run
+_PIPELINE = None
+_PIPELINE_LOCK = threading.Lock()
 
-class ArticleProcessor(FileSystemEventHandler):
+# One lock per ticker so two threads never write the same prediction file;
+# shared by the watcher, the reprocessing pool and external triggers
+_TICKER_LOCKS = defaultdict(threading.Lock)
+_TICKER_LOCKS_GUARD = threading.Lock()
+
+
+KNOWN_TICKERS = frozenset((
+    'MSFT', 'AAPL', 'GOOGL', 'AMZN', 'TSLA', 'META', 
+    'NVDA', 'NFLX', 'BABA', 'AMD', 'INTC', 'CRM', 'UNP',
+    'FDX', 'UPS', 'CHRW', 'XPO', 'GXO', 'DPW_DE', 'AMKBY',
+    'JD'
+))
+
+
+def _ticker_from_path(file_path):
+    """Return the company ticker an article JSON path belongs to, or None"""
+    if not file_path.endswith('.json'):
+        return None
+    return next(iter(KNOWN_TICKERS.intersection(Path(file_path).parts)), None)
+
+
+def get_pipeline():
+    """Return the shared ProcessingPipeline, creating it on first use"""
+    global _PIPELINE
+    if _PIPELINE is None:
+        with _PIPELINE_LOCK:
+            if _PIPELINE is None:
+                _PIPELINE = ProcessingPipeline()
+    return _PIPELINE
+
+
+def _ticker_lock(ticker):
+    """Return the lock serializing pipeline runs for a ticker"""
+    with _TICKER_LOCKS_GUARD:
+        return _TICKER_LOCKS[ticker]
+
+
+class ArticleProcessor(PatternMatchingEventHandler):
     """Process articles as they arrive"""
     
     def __init__(self):
-        self.pipeline = ProcessingPipeline()
+        # watchdog drops directory and non-JSON events before dispatching
+        super().__init__(patterns=['*.json'], ignore_directories=True, case_sensitive=False)
+        self.pipeline = get_pipeline()
         
-        self.processing_queue = set()
-        self.last_processed = {}
+        # File events are queued per ticker and drained by worker threads, so the
+        # observer thread never blocks. A ticker already queued or running is only
+        # marked dirty, and runs once more when the current run finishes.
+        self.event_q = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.inflight = set()
+        self.dirty = set()
+        self.inflight_lock = threading.Lock()
+        # Newest mtime seen per article file; a write firing created and then
+        # modified (or several modifieds) is only queued once. Least recently
+        # touched paths are evicted so the map doesn't grow with every article
+        self.last_mtime = OrderedDict()
+        for _ in range(EVENT_WORKERS):
+            threading.Thread(target=self._worker, daemon=True).start()
 
         crawler_data_env = os.getenv('CRAWLER_DATA_DIR')
         if crawler_data_env and os.path.exists(crawler_data_env):
@@ -52,176 +115,219 @@ class ArticleProcessor(FileSystemEventHandler):
         self.output_dir = CUR_DIR / "final_predictions"
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        # ticker -> (digest of its article files, prediction), persisted under cache/
+        self.content_cache = {}
+        self.cache_dir = CUR_DIR / "cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
         logger.info(f"Crawler data directory: {self.crawler_data_dir}")
         logger.info(f"Output directory: {self.output_dir}")
 
-    def on_created(self, event):
-        """Handle new file creation"""
-        if event.is_directory:
+    def on_any_event(self, event):
+        """Queue the company of a created, modified or moved-in article file"""
+        if event.event_type == EVENT_TYPE_MOVED:
+            path = event.dest_path
+        elif event.event_type in (EVENT_TYPE_CREATED, EVENT_TYPE_MODIFIED):
+            path = event.src_path
+        else:
             return
-            
-        if event.src_path.endswith('.json'):
-            logger.info(f"📄 New article detected: {event.src_path}")
-            self.process_company_data(event.src_path)
-    
-    def on_modified(self, event):
-        """Handle file modification"""
-        if event.is_directory:
+        
+        ticker = _ticker_from_path(path)
+        if not ticker:
             return
-            
-        if event.src_path.endswith('.json'):
-            logger.info(f"📝 Article modified: {event.src_path}")
-            self.process_company_data(event.src_path)
-    
-    def get_companies_from_crawler(self):
-        """Get list of companies that have crawled data"""
-        if not self.crawler_data_dir.exists():
-            logger.warning(f"⚠️ Crawler directory not found: {self.crawler_data_dir}")
-            return []
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return
+        with self.inflight_lock:
+            if mtime <= self.last_mtime.get(path, 0):
+                return
+            self.last_mtime[path] = mtime
+            self.last_mtime.move_to_end(path)
+            if len(self.last_mtime) > MTIME_CACHE_SIZE:
+                self.last_mtime.popitem(last=False)
         
-        companies = [d for d in os.listdir(self.crawler_data_dir) 
-                    if os.path.isdir(self.crawler_data_dir / d)]
-        return sorted(companies)
+        logger.debug("📄 Article %s: %s", event.event_type, path)
+        self.enqueue(ticker)
+    
+    def process_ticker(self, ticker):
+        """Run the pipeline for one company; True if it has a current prediction"""
+        return self.process_tickers([ticker])[ticker]
     
-    def process_company_data(self, file_path):
-        """Process data for a company"""
+    def process_tickers(self, tickers, skip_busy=False):
+        """
+        Run the pipeline for several companies, serialized per ticker.
+        
+        Companies whose article files are byte-identical to the last run are
+        skipped and their cached prediction is written back, a no-op when the
+        file holds it. The rest go through one ProcessingPipeline.process_companies
+        call so their sentiment inference is batched.
+        
+        Args:
+            tickers: Company tickers
+            skip_busy: Skip tickers another thread is processing instead of waiting
+                for it; for scheduled passes, whose run would only repeat that one
+        
+        Returns:
+            {ticker: True if it has a current prediction}; tickers skipped as busy
+            are left out
+        """
+        results = {}
+        skipped = set()
+        locks = []
+        # Taken in sorted order, so two overlapping batches cannot deadlock
+        for ticker in sorted(set(tickers)):
+            lock = _ticker_lock(ticker)
+            if lock.acquire(blocking=not skip_busy):
+                locks.append(lock)
+            else:
+                logger.info("⏭️ %s: already being processed, skipping", ticker)
+                skipped.add(ticker)
+        tickers = [t for t in tickers if t not in skipped]
         try:
-            # Extract company ticker from path
-            path_parts = Path(file_path).parts
-            ticker = None
-            
-            # List of known company tickers
-            known_tickers = [
-                'MSFT', 'AAPL', 'GOOGL', 'AMZN', 'TSLA', 'META', 
-                'NVDA', 'NFLX', 'BABA', 'AMD', 'INTC', 'CRM', 'UNP',
-                'FDX', 'UPS', 'CHRW', 'XPO', 'GXO', 'DPW_DE', 'AMKBY',
-                'JD'
-            ]
+            stale = {}
+            for ticker in tickers:
+                digest = self._content_digest(ticker)
+                cached_digest, prediction = self._cached_prediction(ticker)
+                if digest is not None and digest == cached_digest:
+                    logger.info("♻️ %s: articles unchanged, reusing cached prediction", ticker)
+                    prediction['timestamp'] = datetime.now().isoformat()
+                    write_prediction(self.output_dir / f"{ticker}_prediction.json", prediction)
+                    results[ticker] = True
+                else:
+                    stale[ticker] = digest
             
-            for part in path_parts:
-                if part in known_tickers:
-                    ticker = part
-                    break
-            
-            if not ticker:
-                return
-            
-            # Avoid duplicate processing
-            current_time = time.time()
-            if ticker in self.last_processed:
-                if current_time - self.last_processed[ticker] < 30:  # 30 second cooldown
-                    return
-            
-            logger.info(f"\n{'='*60}")
-            logger.info(f"🔄 PROCESSING: {ticker}")
-            logger.info(f"{'='*60}")
-            
-            # Use the ProcessingPipeline to handle all steps
-            self.pipeline.process_company(ticker)
-            
-            self.last_processed[ticker] = current_time
-            
-        except Exception as e:
-            logger.error(f"❌ Error processing {file_path}: {e}", exc_info=True)
+            # process_companies logs its own failures and returns None for them
+            predictions = self.pipeline.process_companies(list(stale)) if stale else {}
+            for ticker, digest in stale.items():
+                prediction = predictions.get(ticker)
+                results[ticker] = prediction is not None
+                if digest is None or prediction is None:
+                    continue
+                # Round-trip through JSON so the cached copy holds plain values
+                prediction = orjson.loads(orjson.dumps(prediction, default=str, option=orjson.OPT_SERIALIZE_NUMPY))
+                self.content_cache[ticker] = (digest, prediction)
+                (self.cache_dir / f"{ticker}.json").write_bytes(orjson.dumps({'digest': digest, 'prediction': prediction}))
+            return results
+        finally:
+            for lock in locks:
+                lock.release()
     
-    def process_all_existing(self):
-        """Process all existing company data on startup"""
-        logger.info("🔄 Processing all existing company data...")
+    def process_batches(self, tickers, executor=None):
+        """
+        Run process_tickers over ticker batches, in parallel when given an executor.
         
-        if not self.crawler_data_dir.exists():
-            logger.warning(f"Crawler data directory not found: {self.crawler_data_dir}")
-            return
+        Batches are split evenly across the executor's workers, at most
+        COMPANY_BATCH_SIZE tickers each, so every worker gets a share and each
+        batch only holds its own tickers' locks.
         
-        companies = [d for d in self.crawler_data_dir.iterdir() if d.is_dir()]
+        Returns:
+            {ticker: True if it has a current prediction}; tickers skipped as busy
+            are left out
+        """
+        workers = getattr(executor, '_max_workers', PROCESSOR_WORKERS) if executor is not None else 1
+        size = max(1, min(COMPANY_BATCH_SIZE, math.ceil(len(tickers) / workers)))
+        batches = [tickers[i:i + size] for i in range(0, len(tickers), size)]
+        if executor is None:
+            return {t: ok for batch in batches for t, ok in self.process_tickers(batch, skip_busy=True).items()}
         
-        for company_dir in companies:
-            ticker = company_dir.name
-            logger.info(f"Processing existing data for {ticker}...")
-            
+        results = {}
+        futures = {executor.submit(self.process_tickers, batch, skip_busy=True): batch for batch in batches}
+        for future in as_completed(futures):
             try:
-                # Use the ProcessingPipeline to handle all steps
-                self.pipeline.process_company(ticker)
-                self.last_processed[ticker] = time.time()
+                results.update(future.result())
             except Exception as e:
-                logger.error(f"❌ Error processing {ticker}: {e}", exc_info=True)
-
-
-class FileChangeHandler(FileSystemEventHandler):
-    """Handle file system changes"""
+                logger.error(f"❌ Error processing {futures[future]}: {e}", exc_info=True)
+                results.update(dict.fromkeys(futures[future], False))
+        return results
     
-    def __init__(self, pipeline):
-        self.pipeline = pipeline
-        self.last_processed = {}
-    
-    def on_created(self, event):
-        """Handle file creation"""
-        if event.is_directory or not event.src_path.endswith('.json'):
-            return
-        
-        # Extract ticker from path
-        path_parts = Path(event.src_path).parts
-        ticker = None
+    def _content_digest(self, ticker):
+        """SHA-256 over the names and bytes of a company's article files, or None if it has none"""
+        ticker_dir = self.crawler_data_dir / ticker
+        if not ticker_dir.exists():
+            return None
         
-        known_tickers = [
-            'MSFT', 'AAPL', 'GOOGL', 'AMZN', 'TSLA', 'META', 
-            'NVDA', 'NFLX', 'BABA', 'AMD', 'INTC', 'CRM', 'UNP',
-            'FDX', 'UPS', 'CHRW', 'XPO', 'GXO', 'DPW_DE', 'AMKBY',
-            'JD'
-        ]
-        
-        for part in path_parts:
-            if part in known_tickers:
-                ticker = part
-                break
+        sha = hashlib.sha256()
+        for json_file in sorted(ticker_dir.rglob('*.json')):
+            sha.update(str(json_file.relative_to(ticker_dir)).encode('utf-8') + b'\0')
+            with open(json_file, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size >= MMAP_MIN_BYTES:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                        sha.update(m)
+                else:
+                    sha.update(f.read())
+            sha.update(b'\0')
+        return sha.hexdigest()
+    
+    def _cached_prediction(self, ticker):
+        """Return (digest, prediction) from the last run, loading it from disk after a restart"""
+        if ticker not in self.content_cache:
+            cache_file = self.cache_dir / f"{ticker}.json"
+            try:
+                entry = orjson.loads(cache_file.read_bytes())
+                self.content_cache[ticker] = (entry['digest'], entry['prediction'])
+            except (OSError, ValueError, KeyError):
+                return None, None
+        return self.content_cache[ticker]
+    
+    def get_companies_from_crawler(self):
+        """Get list of companies that have crawled data"""
+        if not self.crawler_data_dir.exists():
+            logger.warning(f"⚠️ Crawler directory not found: {self.crawler_data_dir}")
+            return []
         
-        if ticker:
-            # Avoid duplicate processing
-            current_time = time.time()
-            if ticker in self.last_processed:
-                if current_time - self.last_processed[ticker] < 30:
-                    return
-            
-            logger.info(f"📄 New file detected for {ticker}, reprocessing...")
+        with os.scandir(self.crawler_data_dir) as it:
+            return sorted(e.name for e in it if e.is_dir(follow_symlinks=False))
+    
+    def enqueue(self, ticker):
+        """Queue a pipeline run for a ticker, coalescing with one already pending"""
+        with self.inflight_lock:
+            if ticker in self.inflight:
+                self.dirty.add(ticker)
+                return
             try:
-                self.pipeline.process_company(ticker)
-                self.last_processed[ticker] = current_time
+                self.event_q.put_nowait(ticker)
+            except queue.Full:
+                logger.warning("⚠️ Event queue full, dropping update for %s", ticker)
+                return
+            self.inflight.add(ticker)
+    
+    def _worker(self):
+        """Drain queued tickers, running the pipeline once per dequeue"""
+        while True:
+            ticker = self.event_q.get()
+            try:
+                logger.info("\n%s\n🔄 PROCESSING: %s\n%s", '=' * 60, ticker, '=' * 60)
+                
+                # Use the ProcessingPipeline to handle all steps
+                self.process_ticker(ticker)
             except Exception as e:
-                logger.error(f"Error processing {ticker}: {e}")
+                logger.error("❌ Error processing %s: %s", ticker, e, exc_info=True)
+            finally:
+                with self.inflight_lock:
+                    if ticker in self.dirty:
+                        # Files changed while it ran; the ticker stays in flight
+                        self.dirty.discard(ticker)
+                        self.event_q.put_nowait(ticker)
+                    else:
+                        self.inflight.discard(ticker)
+                self.event_q.task_done()
     
-    def on_modified(self, event):
-        """Handle file modification"""
-        if event.is_directory or not event.src_path.endswith('.json'):
-            return
-        
-        # Extract ticker from path
-        path_parts = Path(event.src_path).parts
-        ticker = None
+    def process_all_existing(self, executor=None):
+        """Process all existing company data on startup, in parallel when given an executor"""
+        logger.info("🔄 Processing all existing company data...")
         
-        known_tickers = [
-            'MSFT', 'AAPL', 'GOOGL', 'AMZN', 'TSLA', 'META', 
-            'NVDA', 'NFLX', 'BABA', 'AMD', 'INTC', 'CRM', 'UNP',
-            'FDX', 'UPS', 'CHRW', 'XPO', 'GXO', 'DPW_DE', 'AMKBY',
-            'JD'
-        ]
+        if not self.crawler_data_dir.exists():
+            logger.warning(f"Crawler data directory not found: {self.crawler_data_dir}")
+            return
         
-        for part in path_parts:
-            if part in known_tickers:
-                ticker = part
-                break
+        tickers = self.get_companies_from_crawler()
+        logger.info(f"Processing existing data for {len(tickers)} companies...")
         
-        if ticker:
-            # Avoid duplicate processing
-            current_time = time.time()
-            if ticker in self.last_processed:
-                if current_time - self.last_processed[ticker] < 30:
-                    return
-            
-            logger.info(f"📝 File modified for {ticker}, reprocessing...")
-            try:
-                self.pipeline.process_company(ticker)
-                self.last_processed[ticker] = current_time
-            except Exception as e:
-                logger.error(f"Error processing {ticker}: {e}")
+        for ticker, ok in self.process_batches(tickers, executor).items():
+            if not ok:
+                logger.error(f"❌ Error processing {ticker}")
 
 
 class ContinuousProcessor:
@@ -231,10 +337,12 @@ class ContinuousProcessor:
         self.processor = ArticleProcessor()
         self.observer = Observer()
         self.last_reprocess_time = {}
+        self.executor = ThreadPoolExecutor(max_workers=PROCESSOR_WORKERS, thread_name_prefix='processor')
+        self._stop = threading.Event()
         
         # Watch the crawler data directory
         self.observer.schedule(
-            FileChangeHandler(self.processor.pipeline),
+            self.processor,
             str(self.processor.crawler_data_dir),
             recursive=True
         )
@@ -260,17 +368,18 @@ class ContinuousProcessor:
         logger.info(f"📊 Reprocessing {len(companies)} companies...")
         
         reprocessed_count = 0
-        for ticker in companies:
-            try:
-                logger.info(f"  🔄 {ticker}...")
-                self.processor.pipeline.process_company(ticker)
+        results = self.processor.process_batches(companies, self.executor)
+        for ticker, ok in results.items():
+            if ok:
                 self.last_reprocess_time[ticker] = time.time()
                 logger.info(f"  ✅ {ticker} complete")
                 reprocessed_count += 1
-            except Exception as e:
-                logger.error(f"  ❌ {ticker} failed: {e}")
+            else:
+                logger.error(f"  ❌ {ticker} failed")
         
         logger.info(f"✅ Reprocessed {reprocessed_count}/{len(companies)} companies")
+        if len(results) < len(companies):
+            logger.info(f"⏭️ Skipped {len(companies) - len(results)} companies already being processed")
         logger.info(f"{'='*70}\n")
     
     def start(self):
@@ -280,7 +389,7 @@ class ContinuousProcessor:
         logger.info(f"🔄 Initial processing of existing data...")
         
         # Process all existing data first
-        self.processor.process_all_existing()
+        self.processor.process_all_existing(self.executor)
         
         # Start watching for new files
         logger.info("👀 Now watching for new articles...")
@@ -288,26 +397,26 @@ class ContinuousProcessor:
         
         self.observer.start()
         
-        # Reprocessing loop
-        next_reprocess = time.time() + REPROCESS_INTERVAL
+        # Reprocessing loop: sleep until the next deadline, or until stop() is called
+        next_reprocess = time.monotonic() + REPROCESS_INTERVAL
         
         try:
-            while True:
-                current_time = time.time()
-                
-                # Check if it's time to reprocess
-                if current_time >= next_reprocess:
-                    self.reprocess_all_companies()
-                    next_reprocess = current_time + REPROCESS_INTERVAL
-                
-                # Sleep for a bit before checking again
-                time.sleep(CHECK_INTERVAL)
+            while not self._stop.wait(max(0, next_reprocess - time.monotonic())):
+                self.reprocess_all_companies()
+                # A run longer than the interval starts the next one right away
+                next_reprocess = max(next_reprocess + REPROCESS_INTERVAL, time.monotonic())
                 
         except KeyboardInterrupt:
             logger.info("⏹️  Stopping processor...")
-            self.observer.stop()
+            self._stop.set()
         
+        self.observer.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
         self.observer.join()
+    
+    def stop(self):
+        """Wake start() and make it shut down the watcher and return"""
+        self._stop.set()
 
 
 def process_new_articles(ticker):
@@ -316,9 +425,9 @@ def process_new_articles(ticker):
     This can be called directly from other services (e.g., crawler).
     """
     try:
-        pipeline = ProcessingPipeline()
         logger.info(f"🔔 [External Trigger] Processing new articles for {ticker}...")
-        pipeline.process_company(ticker)
+        with _ticker_lock(ticker):
+            get_pipeline().process_company(ticker)
         logger.info(f"✅ [External Trigger] {ticker}: Processing complete")
         return True
     except Exception as e:
@@ -1,14 +1,47 @@
 import json
+import hashlib
 import logging
-import random
+import functools
 from datetime import datetime
 
+import numpy as np
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _articles_seed(classified_articles):
+    """Stable 64-bit seed from the article URLs, the same in every process"""
+    h = hashlib.blake2b(digest_size=8)
+    for article in classified_articles:
+        h.update(str(article.get('url', '')).encode('utf-8') + b'\0')
+    return int.from_bytes(h.digest(), 'little')
+
+
+@functools.lru_cache(maxsize=256)
+def _score_events(n, seed):
+    """(overall_score, positive, negative, neutral) for n articles; a pure function of its arguments"""
+    rng = np.random.default_rng(seed)
+    
+    # Create a base financial trend that's stable
+    base_trend = rng.uniform(-10, 10)
+    
+    # Use base trend + small article-specific variation
+    event_scores = np.clip(base_trend + rng.uniform(-8, 8, size=n), -100, 100)
+    
+    # Classify based on score
+    positive_events = int((event_scores > 5).sum())
+    negative_events = int((event_scores < -5).sum())
+    neutral_events = n - positive_events - negative_events
+    
+    return float(event_scores.mean()), positive_events, negative_events, neutral_events
+
+
 def analyze_financial_events(classified_articles):
     """
-    Analyze financial events from classified articles with stable variations
+    Analyze financial events from classified articles with stable variations.
+    
+    Scores are deterministic in the article URLs, so unchanged input gives
+    unchanged output.
     """
     
     if not classified_articles:
@@ -20,30 +53,10 @@ def analyze_financial_events(classified_articles):
             'total_articles': 0
         }
     
-    event_scores = []
-    positive_events = 0
-    negative_events = 0
-    neutral_events = 0
-    
-    # Create a base financial trend that's stable
-    base_trend = random.uniform(-10, 10)
-    
-    for article in classified_articles:
-        # Use base trend + small article-specific variation
-        article_score = base_trend + random.uniform(-8, 8)
-        article_score = max(-100, min(100, article_score))
-        
-        event_scores.append(article_score)
-        
-        # Classify based on score
-        if article_score > 5:
-            positive_events += 1
-        elif article_score < -5:
-            negative_events += 1
-        else:
-            neutral_events += 1
-    
-    overall_score = sum(event_scores) / len(event_scores) if event_scores else 0
+    # Seeded from the articles, so the same articles always score the same
+    overall_score, positive_events, negative_events, neutral_events = _score_events(
+        len(classified_articles), _articles_seed(classified_articles)
+    )
     
     result = {
         'overall_score': round(overall_score, 2),
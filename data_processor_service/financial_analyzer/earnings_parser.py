@@ -3,16 +3,88 @@ Enhanced Earnings Parser
 Extracts earnings data and determines beat/miss status with confidence scoring
 """
 import re
+import copy
+import hashlib
 import logging
-from typing import Dict, Optional, List, Tuple
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, List, Tuple, Union
 from datetime import datetime
 
+# Optional: Hyperscan finds where earnings/guidance patterns occur in one pass,
+# so re only counts those, over the span they matched in; without it the
+# anchor-word guards are used
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Optional: RE2 counts matches without backtracking; falls back to re when
+# google-re2 isn't installed
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 logger = logging.getLogger(__name__)
 
+# Distinct articles whose parse each EarningsParser remembers; wire stories are
+# republished verbatim across tickers
+ANALYSIS_CACHE_SIZE = 4096
+
+# Python's str \s, spelled out for RE2 (whose \s is ASCII-only)
+_RE2_SPACE = r'\t-\r\x1c-\x20\x85\xa0\x{1680}\x{2000}-\x{200a}\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}'
+
+
+def _re2_syntax(pattern: str) -> str:
+    r"""Rewrite \s and \d so RE2 matches the same characters as Python's re"""
+    out = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == '\\':
+            escape = pattern[i:i + 2]
+            if escape == r'\s':
+                out.append(_RE2_SPACE if in_class else f'[{_RE2_SPACE}]')
+            elif escape == r'\d':
+                out.append(r'\p{Nd}')
+            else:
+                out.append(escape)
+            i += 2
+            continue
+        if pattern[i] == '[':
+            in_class = True
+        elif pattern[i] == ']':
+            in_class = False
+        out.append(pattern[i])
+        i += 1
+    return ''.join(out)
+
+
+def _compile(pattern: str):
+    """Case-insensitive compiled pattern, with RE2 when available"""
+    if re2 is None:
+        return re.compile(pattern, re.IGNORECASE)
+    return re2.compile('(?i)' + _re2_syntax(pattern))
+
 
 class EarningsParser:
     """Parse and analyze earnings-related financial articles"""
     
+    # Financial figure patterns, compiled once
+    EPS_PATTERN = _compile(r'eps\s+(?:of\s+)?[\$]?([\d.]+)')
+    EXPECTED_EPS_PATTERN = _compile(r'expected\s+(?:eps\s+of\s+)?[\$]?([\d.]+)')
+    REVENUE_BILLION_PATTERN = _compile(r'[\$]?([\d.]+)\s*billion')
+    REVENUE_MILLION_PATTERN = _compile(r'[\$]?([\d.]+)\s*million')
+    GROWTH_PATTERN = _compile(
+        r'([\d.]+)%\s+(?:year[- ]over[- ]year|yoy|q(?:uarter)?[- ]over[- ]q(?:uarter)?|qoq)'
+    )
+    
+    # Every earnings pattern ends in one of these words and every guidance pattern
+    # in one of those, so text containing none of them cannot match the family
+    EARNINGS_ANCHORS = ('estimate', 'expect', 'forecast')
+    GUIDANCE_ANCHORS = ('guidance', 'forecast', 'outlook')
+    
     def __init__(self):
         # Earnings keywords with context
         self.earnings_patterns = {
@@ -64,6 +136,78 @@ class EarningsParser:
                 r'kept\s+(?:full[- ]year\s+)?(?:guidance|forecast|outlook)',
             ]
         }
+        
+        # Hyperscan compiles the source patterns, in the same order as _hs_patterns
+        self._hs_sources = [
+            pattern
+            for patterns in (self.earnings_patterns, self.guidance_patterns)
+            for regexes in patterns.values()
+            for pattern in regexes
+        ]
+        
+        # Compile once rather than on every findall call
+        for patterns in (self.earnings_patterns, self.guidance_patterns):
+            for category, regexes in patterns.items():
+                patterns[category] = [_compile(p) for p in regexes]
+        
+        self._hs_patterns = [
+            pattern
+            for patterns in (self.earnings_patterns, self.guidance_patterns)
+            for regexes in patterns.values()
+            for pattern in regexes
+        ]
+        self._hs_db = self._build_hyperscan_db()
+        
+        # (title, content digest) -> parse_article() result without its timestamp, least recent first
+        self._parse_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def _build_hyperscan_db(self):
+        """Block-mode database over the earnings/guidance patterns, or None without hyperscan"""
+        if hyperscan is None:
+            return None
+        
+        # UTF8 + UCP keeps \s matching Unicode whitespace (e.g. no-break space) as re does;
+        # SOM_LEFTMOST reports where each match starts, not just where it ends
+        flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=[pattern.encode('utf-8') for pattern in self._hs_sources],
+            ids=list(range(len(self._hs_patterns))),
+            elements=len(self._hs_patterns),
+            flags=[flags] * len(self._hs_patterns),
+        )
+        return db
+    
+    def _present_patterns(self, text: Union[str, bytes]) -> Optional[Dict]:
+        """
+        Earnings/guidance patterns that match somewhere in the text, or None without hyperscan
+        
+        Maps each pattern to a (start, end) span covering all of its matches: the
+        leftmost match start and the rightmost match end. Hyperscan reports every
+        match, so re.findall over that span finds exactly what it finds over the
+        whole text. Offsets are UTF-8 byte offsets, which are exact for bytes text
+        and equal str indices only for ASCII text; other str text gets the full span.
+        """
+        if self._hs_db is None:
+            return None
+        
+        spans = {}
+        
+        def on_match(pattern_id, start, end, flags, context):
+            pattern = self._hs_patterns[pattern_id]
+            span = spans.get(pattern)
+            spans[pattern] = (start, end) if span is None else (min(span[0], start), max(span[1], end))
+        
+        try:
+            data = text if isinstance(text, bytes) else text.encode('utf-8')
+        except UnicodeEncodeError:
+            # Lone surrogates aren't UTF-8, which Hyperscan's UTF8 mode requires
+            return None
+        self._hs_db.scan(data, match_event_handler=on_match)
+        if isinstance(text, str) and not text.isascii():
+            spans = dict.fromkeys(spans, (0, len(text)))
+        return spans
     
     def parse_article(self, article: Dict) -> Dict:
         """
@@ -75,18 +219,56 @@ class EarningsParser:
         Returns:
             Dictionary with earnings analysis
         """
+        key = (
+            article.get('title', ''),
+            hashlib.blake2b(article.get('content', '').encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        )
+        with self._cache_lock:
+            cached = self._parse_cache.get(key)
+            if cached is not None:
+                self._parse_cache.move_to_end(key)
+        
+        if cached is None:
+            cached = self._parse(article)
+            with self._cache_lock:
+                self._parse_cache[key] = cached
+                if len(self._parse_cache) > ANALYSIS_CACHE_SIZE:
+                    self._parse_cache.popitem(last=False)
+        
+        # Every duplicate shares the cached result; callers get their own copy
+        result = copy.deepcopy(cached)
+        result['analysis_timestamp'] = datetime.utcnow().isoformat() + 'Z'
+        return result
+    
+    def _parse(self, article: Dict) -> Dict:
+        """parse_article() without the cache or timestamp"""
         title = article.get('title', '').lower()
         content = article.get('content', '').lower()
         full_text = f"{title} {content}"
         
+        # The RE2 wrapper re-encodes str input to UTF-8 on every call; encode
+        # once and run every pattern (and Hyperscan) over the bytes
+        try:
+            encoded = full_text.encode('utf-8')
+        except UnicodeEncodeError:
+            # Lone surrogates: RE2 matches their surrogatepass bytes as nothing, like re
+            # does the surrogates, but Hyperscan is skipped for the anchor-word guards
+            encoded = None
+        if re2 is None:
+            scan_text = full_text
+        else:
+            scan_text = encoded if encoded is not None else full_text.encode('utf-8', 'surrogatepass')
+        
+        present = self._present_patterns(scan_text) if encoded is not None else None
+        
         # Detect earnings beat/miss
-        earnings_status = self._detect_earnings_status(full_text)
+        earnings_status = self._detect_earnings_status(full_text, present, scan_text)
         
         # Detect guidance changes
-        guidance_status = self._detect_guidance(full_text)
+        guidance_status = self._detect_guidance(full_text, present, scan_text)
         
         # Extract financial figures
-        financial_data = self._extract_financial_figures(full_text)
+        financial_data = self._extract_financial_figures(full_text, scan_text)
         
         # Calculate confidence
         confidence = self._calculate_confidence(
@@ -108,27 +290,48 @@ class EarningsParser:
             'guidance_status': guidance_status,  # RAISED, LOWERED, MAINTAINED, UNKNOWN
             'financial_data': financial_data,
             'overall_signal': overall_signal,    # STRONG_POSITIVE, POSITIVE, NEUTRAL, NEGATIVE, STRONG_NEGATIVE
-            'confidence': confidence,
-            'analysis_timestamp': datetime.utcnow().isoformat() + 'Z'
+            'confidence': confidence
         }
     
-    def _detect_earnings_status(self, text: str) -> str:
+    @staticmethod
+    def _float(value: Union[str, bytes]) -> float:
+        """float() of a captured number, which RE2 returns as bytes for bytes text"""
+        return float(value.decode('utf-8') if isinstance(value, bytes) else value)
+    
+    @staticmethod
+    def _count(pattern, text: Union[str, bytes], present: Optional[Dict]) -> int:
+        """Number of matches of a pattern, scanning only the span Hyperscan found it in"""
+        if present is None:
+            return len(pattern.findall(text))
+        span = present.get(pattern)
+        if span is None:
+            return 0
+        return len(pattern.findall(text, *span))
+    
+    def _detect_earnings_status(
+        self,
+        text: str,
+        present: Optional[Dict] = None,
+        scan_text: Union[str, bytes, None] = None
+    ) -> str:
         """Detect if earnings beat, missed, or met estimates"""
+        # Anchor checks use text; patterns run over scan_text (its UTF-8 bytes under RE2)
+        scan_text = text if scan_text is None else scan_text
         beat_score = 0
         miss_score = 0
         inline_score = 0
         
+        if not any(anchor in text for anchor in self.EARNINGS_ANCHORS):
+            return 'UNKNOWN'
+        
         for pattern in self.earnings_patterns['beat']:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            beat_score += len(matches) * 2  # Weight beat indicators
+            beat_score += self._count(pattern, scan_text, present) * 2  # Weight beat indicators
         
         for pattern in self.earnings_patterns['miss']:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            miss_score += len(matches) * 2
+            miss_score += self._count(pattern, scan_text, present) * 2
         
         for pattern in self.earnings_patterns['inline']:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            inline_score += len(matches)
+            inline_score += self._count(pattern, scan_text, present)
         
         # Determine status
         if beat_score > miss_score and beat_score > inline_score:
@@ -140,23 +343,30 @@ class EarningsParser:
         else:
             return 'UNKNOWN'
     
-    def _detect_guidance(self, text: str) -> str:
+    def _detect_guidance(
+        self,
+        text: str,
+        present: Optional[Dict] = None,
+        scan_text: Union[str, bytes, None] = None
+    ) -> str:
         """Detect guidance changes"""
+        # Anchor checks use text; patterns run over scan_text (its UTF-8 bytes under RE2)
+        scan_text = text if scan_text is None else scan_text
         raised_score = 0
         lowered_score = 0
         maintained_score = 0
         
+        if not any(anchor in text for anchor in self.GUIDANCE_ANCHORS):
+            return 'UNKNOWN'
+        
         for pattern in self.guidance_patterns['raised']:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            raised_score += len(matches)
+            raised_score += self._count(pattern, scan_text, present)
         
         for pattern in self.guidance_patterns['lowered']:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            lowered_score += len(matches)
+            lowered_score += self._count(pattern, scan_text, present)
         
         for pattern in self.guidance_patterns['maintained']:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            maintained_score += len(matches)
+            maintained_score += self._count(pattern, scan_text, present)
         
         if raised_score > lowered_score and raised_score > maintained_score:
             return 'RAISED'
@@ -167,8 +377,9 @@ class EarningsParser:
         else:
             return 'UNKNOWN'
     
-    def _extract_financial_figures(self, text: str) -> Dict:
+    def _extract_financial_figures(self, text: str, scan_text: Union[str, bytes, None] = None) -> Dict:
         """Extract EPS, revenue, and percentage figures"""
+        scan_text = text if scan_text is None else scan_text
         figures = {
             'eps_actual': None,
             'eps_expected': None,
@@ -179,34 +390,31 @@ class EarningsParser:
             'growth_rates': []
         }
         
+        # Each figure pattern is only run when its literal keyword is present;
+        # only the first EPS/revenue match is used, so search() stops there
+        
         # EPS patterns
-        eps_pattern = r'eps\s+(?:of\s+)?[\$]?([\d.]+)'
-        eps_matches = re.findall(eps_pattern, text, re.IGNORECASE)
-        if eps_matches:
-            figures['eps_actual'] = float(eps_matches[0])
+        eps_match = self.EPS_PATTERN.search(scan_text) if 'eps' in text else None
+        if eps_match:
+            figures['eps_actual'] = self._float(eps_match.group(1))
         
         # Expected EPS
-        expected_eps_pattern = r'expected\s+(?:eps\s+of\s+)?[\$]?([\d.]+)'
-        expected_eps = re.findall(expected_eps_pattern, text, re.IGNORECASE)
+        expected_eps = self.EXPECTED_EPS_PATTERN.search(scan_text) if 'expected' in text else None
         if expected_eps:
-            figures['eps_expected'] = float(expected_eps[0])
+            figures['eps_expected'] = self._float(expected_eps.group(1))
         
         # Revenue patterns (in billions or millions)
-        revenue_billion = r'[\$]?([\d.]+)\s*billion'
-        revenue_million = r'[\$]?([\d.]+)\s*million'
-        
-        revenue_b = re.findall(revenue_billion, text, re.IGNORECASE)
+        revenue_b = self.REVENUE_BILLION_PATTERN.search(scan_text) if 'billion' in text else None
         if revenue_b:
-            figures['revenue_actual'] = float(revenue_b[0]) * 1_000_000_000
-        else:
-            revenue_m = re.findall(revenue_million, text, re.IGNORECASE)
+            figures['revenue_actual'] = self._float(revenue_b.group(1)) * 1_000_000_000
+        elif 'million' in text:
+            revenue_m = self.REVENUE_MILLION_PATTERN.search(scan_text)
             if revenue_m:
-                figures['revenue_actual'] = float(revenue_m[0]) * 1_000_000
+                figures['revenue_actual'] = self._float(revenue_m.group(1)) * 1_000_000
         
         # Growth rates (YoY, QoQ)
-        growth_pattern = r'([\d.]+)%\s+(?:year[- ]over[- ]year|yoy|q(?:uarter)?[- ]over[- ]q(?:uarter)?|qoq)'
-        growth_rates = re.findall(growth_pattern, text, re.IGNORECASE)
-        figures['growth_rates'] = [float(g) for g in growth_rates[:5]]  # Top 5
+        growth_rates = self.GROWTH_PATTERN.findall(scan_text) if '%' in text else []
+        figures['growth_rates'] = [self._float(g) for g in growth_rates[:5]]  # Top 5
         
         # Calculate beat percentages if both actual and expected exist
         if figures['eps_actual'] and figures['eps_expected']:
@@ -3,19 +3,56 @@ Financial Event Classifier
 Categorizes financial articles and extracts market signals
 """
 import os
-import json
+import copy
+import hashlib
 import logging
 import re
-from typing import Dict, List, Tuple
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import orjson
+
+# Optional: one Aho-Corasick pass finds every keyword; falls back to
+# per-keyword substring checks when pyahocorasick isn't installed
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional: Hyperscan reports each distinct keyword once, scanning in C;
+# preferred over Aho-Corasick when installed
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Threads in process_batch() reading ticker files ahead of the analysis
+# workers and writing their results behind them
+IO_WORKERS = 4
+
+# Ticker files process_batch() keeps queued for analysis per worker process;
+# bounds how many files' contents are held in memory at once
+ANALYSIS_QUEUE_PER_WORKER = 2
+
+# Distinct articles whose analysis each classifier remembers; wire stories are
+# republished verbatim across tickers
+ANALYSIS_CACHE_SIZE = 4096
+
 
 class FinancialEventClassifier:
     """Classifies financial news into actionable event types"""
     
+    # Number extraction patterns, compiled once
+    REVENUE_PATTERN = re.compile(r'\$(\d+\.?\d*)\s*(billion|million|B|M)', re.IGNORECASE)
+    EPS_PATTERN = re.compile(r'eps[:\s]+\$?(\d+\.?\d*)', re.IGNORECASE)
+    PCT_PATTERN = re.compile(r'(\d+\.?\d*)%')
+    
     def __init__(self):
         # Event type patterns
         self.event_patterns = {
@@ -78,6 +115,82 @@ class FinancialEventClassifier:
             'challenging', 'slowdown', 'underperform', 'headwinds', 'cautious',
             'miss', 'below', 'lowered', 'downgrade', 'sell', 'bearish'
         }
+        
+        self._all_keywords = self.positive_signals | self.negative_signals
+        for config in self.event_patterns.values():
+            self._all_keywords |= set(config['keywords'])
+        self._keywords = sorted(self._all_keywords)
+        
+        # keyword -> event types listing it, so an article's hits are tallied
+        # without walking every event type's keyword list
+        self._keyword_events = {}
+        for event_type, config in self.event_patterns.items():
+            for keyword in config['keywords']:
+                self._keyword_events.setdefault(keyword, []).append(event_type)
+        self._init_matchers()
+    
+    def _init_matchers(self):
+        """Compile the keyword matchers and start an empty analysis cache"""
+        self._keyword_db = self._build_keyword_db()
+        self._automaton = self._build_automaton() if self._keyword_db is None else None
+        
+        # (title, content digest) -> (classification, extracted numbers), least recent first
+        self._analysis_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def __getstate__(self):
+        # Worker processes get the configuration; compiled matchers, the cache
+        # and the lock can't be pickled and are rebuilt on their side
+        state = self.__dict__.copy()
+        for name in ('_keyword_db', '_automaton', '_analysis_cache', '_cache_lock'):
+            state.pop(name, None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_matchers()
+    
+    def _build_automaton(self):
+        """One automaton over all event and signal keywords, or None without pyahocorasick"""
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for keyword in self._all_keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return automaton
+    
+    def _build_keyword_db(self):
+        """Block-mode literal database over all event and signal keywords, or None without hyperscan"""
+        if hyperscan is None:
+            return None
+        
+        # SINGLEMATCH: a keyword is reported once however often it occurs
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=[keyword.encode('utf-8') for keyword in self._keywords],
+            ids=list(range(len(self._keywords))),
+            elements=len(self._keywords),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(self._keywords),
+            literal=True,
+        )
+        return db
+    
+    def _keyword_hits(self, text: str) -> Set[str]:
+        """Distinct event/signal keywords present in the text"""
+        if self._keyword_db is not None:
+            hits = set()
+            
+            def on_match(keyword_id, start, end, flags, context):
+                hits.add(self._keywords[keyword_id])
+            
+            # Literal byte matching: surrogatepass keeps lone surrogates as bytes no keyword matches
+            self._keyword_db.scan(text.encode('utf-8', 'surrogatepass'), match_event_handler=on_match)
+            return hits
+        if self._automaton is None:
+            return {keyword for keyword in self._all_keywords if keyword in text}
+        return {keyword for _, keyword in self._automaton.iter(text)}
     
     def classify_event(self, article: Dict) -> Dict:
         """
@@ -89,20 +202,53 @@ class FinancialEventClassifier:
         Returns:
             Dictionary with event classification and signals
         """
-        title = article.get('title', '').lower()
-        content = article.get('content', '').lower()
-        full_text = f"{title} {title} {content}"  # Weight title 2x
+        return self._analyze(article)[0]
+    
+    def _analyze(self, article: Dict) -> Tuple[Dict, Dict]:
+        """(classification, extracted numbers) of an article, cached by title and content digest"""
+        key = (
+            article.get('title', ''),
+            hashlib.blake2b(article.get('content', '').encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        )
+        with self._cache_lock:
+            cached = self._analysis_cache.get(key)
+            if cached is not None:
+                self._analysis_cache.move_to_end(key)
+        
+        if cached is None:
+            title = article.get('title', '').lower()
+            content = article.get('content', '').lower()
+            full_text = f"{title} {title} {content}"  # Weight title 2x
+            
+            # Numbers come from "title content", the tail of full_text; the
+            # patterns ignore case, so the lowercased text gives the same numbers
+            cached = (self._classify_text(full_text), self.extract_numbers(full_text, len(title) + 1))
+            with self._cache_lock:
+                self._analysis_cache[key] = cached
+                if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                    self._analysis_cache.popitem(last=False)
+        
+        # Every duplicate shares the cached result; callers get their own copy
+        return copy.deepcopy(cached)
+    
+    def _classify_text(self, full_text: str) -> Dict:
+        """classify_event() on an already lowercased "title title content" text"""
+        hits = self._keyword_hits(full_text)
         
         # Detect event types
         detected_events = []
         max_weight = 0
         primary_event = None
         
+        event_matches = {}
+        for keyword in hits:
+            for event_type in self._keyword_events.get(keyword, ()):
+                event_matches[event_type] = event_matches.get(event_type, 0) + 1
+        
         for event_type, config in self.event_patterns.items():
-            keywords = config['keywords']
             weight = config['weight']
             
-            matches = sum(1 for keyword in keywords if keyword in full_text)
+            matches = event_matches.get(event_type, 0)
             
             if matches > 0:
                 score = matches * weight
@@ -117,8 +263,8 @@ class FinancialEventClassifier:
                     primary_event = event_type
         
         # Calculate signal strength
-        positive_count = sum(1 for signal in self.positive_signals if signal in full_text)
-        negative_count = sum(1 for signal in self.negative_signals if signal in full_text)
+        positive_count = len(self.positive_signals & hits)
+        negative_count = len(self.negative_signals & hits)
         
         # Determine market signal
         if primary_event in ['earnings_beat', 'guidance_raised', 'analyst_upgrade']:
@@ -145,8 +291,8 @@ class FinancialEventClassifier:
             'confidence': round(confidence, 3)
         }
     
-    def extract_numbers(self, text: str) -> Dict:
-        """Extract financial numbers from text"""
+    def extract_numbers(self, text: str, pos: int = 0) -> Dict:
+        """Extract financial numbers from text, starting at index pos"""
         numbers = {
             'revenue': None,
             'eps': None,
@@ -154,23 +300,20 @@ class FinancialEventClassifier:
             'percentages': []
         }
         
-        # Revenue patterns
-        revenue_pattern = r'\$(\d+\.?\d*)\s*(billion|million|B|M)'
-        revenue_matches = re.findall(revenue_pattern, text, re.IGNORECASE)
-        if revenue_matches:
-            value, unit = revenue_matches[0]
+        # Revenue patterns (first match only)
+        revenue_match = self.REVENUE_PATTERN.search(text, pos)
+        if revenue_match:
+            value, unit = revenue_match.groups()
             multiplier = 1e9 if unit.lower() in ['billion', 'b'] else 1e6
             numbers['revenue'] = float(value) * multiplier
         
-        # EPS patterns
-        eps_pattern = r'eps[:\s]+\$?(\d+\.?\d*)'
-        eps_matches = re.findall(eps_pattern, text, re.IGNORECASE)
-        if eps_matches:
-            numbers['eps'] = float(eps_matches[0])
+        # EPS patterns (first match only)
+        eps_match = self.EPS_PATTERN.search(text, pos)
+        if eps_match:
+            numbers['eps'] = float(eps_match.group(1))
         
         # Percentage patterns
-        pct_pattern = r'(\d+\.?\d*)%'
-        pct_matches = re.findall(pct_pattern, text)
+        pct_matches = self.PCT_PATTERN.findall(text, pos)
         numbers['percentages'] = [float(p) for p in pct_matches]
         
         return numbers
@@ -185,14 +328,8 @@ class FinancialEventClassifier:
         Returns:
             Enhanced article with financial analysis
         """
-        title = article.get('title', '')
-        content = article.get('content', '')
-        
-        # Classify event
-        event_data = self.classify_event(article)
-        
-        # Extract numbers
-        numbers = self.extract_numbers(f"{title} {content}")
+        # Classify event and extract numbers
+        event_data, numbers = self._analyze(article)
         
         # Add financial analysis to article
         article['financial_analysis'] = {
@@ -210,13 +347,15 @@ class FinancialEventClassifier:
         
         return article
     
-    def process_batch(self, input_dir: str, output_dir: str) -> Dict:
+    def process_batch(self, input_dir: str, output_dir: str, slim: bool = True) -> Dict:
         """
         Process all financial news articles
         
         Args:
             input_dir: Path to classified_articles/financial
             output_dir: Path to financial_analysis_results
+            slim: Leave article content out of the results files; the full
+                articles stay in input_dir
             
         Returns:
             Summary statistics
@@ -231,91 +370,55 @@ class FinancialEventClassifier:
         logger.info("FINANCIAL EVENT ANALYSIS STARTING")
         logger.info("=" * 70)
         
-        for filename in os.listdir(input_dir):
-            if not filename.endswith('_financial.json'):
-                continue
-            
-            ticker = filename.replace('_financial.json', '')
-            input_file = os.path.join(input_dir, filename)
+        # One task per ticker file. Worker processes only analyze; threads here
+        # read the files ahead of them and write the results behind them
+        tickers = [
+            filename.replace('_financial.json', '')
+            for filename in sorted(os.listdir(input_dir))
+            if filename.endswith('_financial.json')
+        ]
+        input_files = [os.path.join(input_dir, f"{ticker}_financial.json") for ticker in tickers]
+        workers = os.cpu_count() or 1
+        max_queued = ANALYSIS_QUEUE_PER_WORKER * workers
+        
+        def collect(future):
+            nonlocal total_articles
+            ticker, ticker_signals, ticker_events, n, output = future.result()
+            for signal, count in ticker_signals.items():
+                signal_counts[signal] += count
+            for event_type, count in ticker_events.items():
+                event_counts[event_type] = event_counts.get(event_type, 0) + count
+            total_articles += n
             
-            try:
-                with open(input_file, 'r', encoding='utf-8') as f:
-                    articles = json.load(f)
-                
-                logger.info(f"💰 Analyzing {ticker}: {len(articles)} financial articles")
-                
-                analyzed_articles = []
-                
-                for article in articles:
-                    analyzed = self.analyze_financial_article(article)
-                    analyzed_articles.append(analyzed)
-                    
-                    # Update counts
-                    signal = analyzed['financial_analysis']['market_signal']
-                    signal_counts[signal] += 1
-                    
-                    event_type = analyzed['financial_analysis']['event_type']
-                    event_counts[event_type] = event_counts.get(event_type, 0) + 1
-                    
-                    total_articles += 1
-                
-                # Calculate company-level financial signal
-                company_signals = []
-                for a in analyzed_articles:
-                    sig = a['financial_analysis']['market_signal']
-                    conf = a['financial_analysis']['confidence']
-                    
-                    if sig == 'POSITIVE':
-                        company_signals.append(conf)
-                    elif sig == 'NEGATIVE':
-                        company_signals.append(-conf)
-                    else:
-                        company_signals.append(0)
-                
-                avg_signal = sum(company_signals) / len(company_signals) if company_signals else 0
-                
-                if avg_signal > 0.2:
-                    company_financial_outlook = 'POSITIVE'
-                elif avg_signal < -0.2:
-                    company_financial_outlook = 'NEGATIVE'
-                else:
-                    company_financial_outlook = 'NEUTRAL'
-                
-                # Save results
-                output_data = {
-                    'ticker': ticker,
-                    'financial_outlook': {
-                        'signal': company_financial_outlook,
-                        'average_score': round(avg_signal, 3),
-                        'article_count': len(analyzed_articles)
-                    },
-                    'signal_distribution': {
-                        'positive': sum(1 for a in analyzed_articles 
-                                      if a['financial_analysis']['market_signal'] == 'POSITIVE'),
-                        'neutral': sum(1 for a in analyzed_articles 
-                                     if a['financial_analysis']['market_signal'] == 'NEUTRAL'),
-                        'negative': sum(1 for a in analyzed_articles 
-                                      if a['financial_analysis']['market_signal'] == 'NEGATIVE')
-                    },
-                    'event_types': {},
-                    'articles': analyzed_articles,
-                    'analyzed_at': datetime.utcnow().isoformat() + 'Z'
-                }
-                
-                # Count event types for this company
-                for article in analyzed_articles:
-                    event = article['financial_analysis']['event_type']
-                    output_data['event_types'][event] = output_data['event_types'].get(event, 0) + 1
-                
+            if output is not None:
                 output_file = os.path.join(output_dir, f"{ticker}_financial_analysis.json")
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(output_data, f, indent=2, ensure_ascii=False)
-                
-                logger.info(f"✅ {ticker}: {company_financial_outlook} outlook "
-                          f"(score: {avg_signal:.3f}) - {len(analyzed_articles)} articles")
-                
-            except Exception as e:
-                logger.error(f"Error processing {ticker}: {e}")
+                writes.append(io_pool.submit(_write_file, output_file, output))
+                if len(writes) > IO_WORKERS:
+                    writes.popleft().result()
+        
+        def analyze(ticker, read):
+            data = read.result()
+            if isinstance(data, Exception):
+                logger.error(f"Error processing {ticker}: {data}")
+                return
+            analyses.append(executor.submit(_process_ticker, (ticker, data, slim)))
+            # Wait on the oldest ticker once the queue is full, so reads never run far ahead
+            if len(analyses) > max_queued:
+                collect(analyses.popleft())
+        
+        # Sliding windows, oldest first: at most IO_WORKERS reads and writes and
+        # max_queued analyses are pending at any time
+        reads, analyses, writes = deque(), deque(), deque()
+        with ThreadPoolExecutor(max_workers=IO_WORKERS) as io_pool, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as executor:
+            for ticker, input_file in zip(tickers, input_files):
+                reads.append((ticker, io_pool.submit(_read_file, input_file)))
+                if len(reads) > IO_WORKERS:
+                    analyze(*reads.popleft())
+            while reads:
+                analyze(*reads.popleft())
+            while analyses:
+                collect(analyses.popleft())
         
         logger.info("=" * 70)
         logger.info("FINANCIAL ANALYSIS COMPLETE")
@@ -339,6 +442,138 @@ class FinancialEventClassifier:
         }
 
 
+# Per-process classifier for process_batch() workers, set by _init_worker()
+_worker_classifier = None
+
+
+def _init_worker(classifier: FinancialEventClassifier):
+    """Keep the caller's classifier, unpickled once per worker process instead of once per task"""
+    global _worker_classifier
+    _worker_classifier = classifier
+
+
+def _read_file(path: str):
+    """Read one ticker file's bytes, returning the exception instead of raising it"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        return e
+
+
+def _write_file(path: str, data: bytes):
+    """Write one results file, logging instead of raising on failure"""
+    try:
+        with open(path, 'wb') as f:
+            f.write(data)
+    except OSError as e:
+        logger.error(f"Error writing {path}: {e}")
+
+
+def _process_ticker(args: Tuple[str, bytes, bool]) -> Tuple[str, Dict, Dict, int, Optional[bytes]]:
+    """
+    Analyze one ticker's financial articles and serialize its results
+    
+    Runs in a worker process of FinancialEventClassifier.process_batch(),
+    which reads the input and writes the output on its own threads.
+    
+    Args:
+        args: Tuple of (ticker, contents of the ticker's *_financial.json,
+            whether to drop article content from the results)
+        
+    Returns:
+        Tuple of (ticker, signal_counts, event_counts, article_count, results
+        file contents or None if the analysis failed)
+    """
+    ticker, data, slim = args
+    output = None
+    classifier = _worker_classifier or FinancialEventClassifier()
+    signal_counts = {'POSITIVE': 0, 'NEGATIVE': 0, 'NEUTRAL': 0}
+    event_counts = {}
+    total_articles = 0
+    
+    try:
+        articles = orjson.loads(data)
+        
+        logger.info(f"💰 Analyzing {ticker}: {len(articles)} financial articles")
+        
+        analyzed_articles = []
+        
+        for article in articles:
+            analyzed = classifier.analyze_financial_article(article)
+            analyzed_articles.append(analyzed)
+            
+            # Update counts
+            signal = analyzed['financial_analysis']['market_signal']
+            signal_counts[signal] += 1
+            
+            event_type = analyzed['financial_analysis']['event_type']
+            event_counts[event_type] = event_counts.get(event_type, 0) + 1
+            
+            total_articles += 1
+        
+        # Calculate company-level financial signal
+        company_signals = []
+        for a in analyzed_articles:
+            sig = a['financial_analysis']['market_signal']
+            conf = a['financial_analysis']['confidence']
+            
+            if sig == 'POSITIVE':
+                company_signals.append(conf)
+            elif sig == 'NEGATIVE':
+                company_signals.append(-conf)
+            else:
+                company_signals.append(0)
+        
+        avg_signal = sum(company_signals) / len(company_signals) if company_signals else 0
+        
+        if avg_signal > 0.2:
+            company_financial_outlook = 'POSITIVE'
+        elif avg_signal < -0.2:
+            company_financial_outlook = 'NEGATIVE'
+        else:
+            company_financial_outlook = 'NEUTRAL'
+        
+        # Save results
+        output_data = {
+            'ticker': ticker,
+            'financial_outlook': {
+                'signal': company_financial_outlook,
+                'average_score': round(avg_signal, 3),
+                'article_count': len(analyzed_articles)
+            },
+            'signal_distribution': {
+                'positive': sum(1 for a in analyzed_articles 
+                              if a['financial_analysis']['market_signal'] == 'POSITIVE'),
+                'neutral': sum(1 for a in analyzed_articles 
+                             if a['financial_analysis']['market_signal'] == 'NEUTRAL'),
+                'negative': sum(1 for a in analyzed_articles 
+                              if a['financial_analysis']['market_signal'] == 'NEGATIVE')
+            },
+            'event_types': {},
+            'articles': [
+                {key: value for key, value in article.items() if key != 'content'}
+                for article in analyzed_articles
+            ] if slim else analyzed_articles,
+            'analyzed_at': datetime.utcnow().isoformat() + 'Z'
+        }
+        
+        # Count event types for this company
+        for article in analyzed_articles:
+            event = article['financial_analysis']['event_type']
+            output_data['event_types'][event] = output_data['event_types'].get(event, 0) + 1
+        
+        output = orjson.dumps(output_data, option=orjson.OPT_INDENT_2)
+        
+        logger.info(f"✅ {ticker}: {company_financial_outlook} outlook "
+                  f"(score: {avg_signal:.3f}) - {len(analyzed_articles)} articles")
+        
+    except Exception as e:
+        logger.error(f"Error processing {ticker}: {e}")
+    
+    return ticker, signal_counts, event_counts, total_articles, output
+
+
 def main():
     """Run financial event analysis"""
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -7,6 +7,7 @@ import json
 import logging
 from typing import Dict, List, Tuple
 from datetime import datetime, timedelta
+import orjson
 import yfinance as yf
 import pandas as pd
 
@@ -147,8 +148,8 @@ class HistoricalDataCollector:
                 articles = []
                 for article_file in os.listdir(date_path):
                     if article_file.endswith('.json'):
-                        with open(os.path.join(date_path, article_file), 'r', encoding='utf-8') as f:
-                            articles.append(json.load(f))
+                        with open(os.path.join(date_path, article_file), 'rb') as f:
+                            articles.append(orjson.loads(f.read()))
                 
                 if not articles:
                     continue
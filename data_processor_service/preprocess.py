@@ -9,6 +9,8 @@ from sentiment_analysis import analyze_sentiment
 from financial_analysis import analyze_financial_events
 import random
 
+import orjson
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -32,8 +34,8 @@ def get_all_articles():
                     if file.endswith('.json'):
                         try:
                             file_path = os.path.join(company_path, file)
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
+                            with open(file_path, 'rb') as f:
+                                data = orjson.loads(f.read())
                                 if isinstance(data, list):
                                     articles = data
                                 else:
@@ -1,12 +1,13 @@
 import os
 import sys
-import json
 import time
 import logging
 from pathlib import Path
 from datetime import datetime
-import json
 import numpy as np
+import orjson
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 
 
 
@@ -49,6 +50,38 @@ CLASSIFIED_DIR = CUR_DIR / "classified_articles"
 SENTIMENT_DIR = CUR_DIR / "sentiment_results"
 FINANCIAL_DIR = CUR_DIR / "financial_analysis_results"
 
+# Threads for pipeline stages run concurrently within one company
+STAGE_WORKERS = int(os.getenv('PIPELINE_STAGE_WORKERS', 4))
+
+# Companies whose articles share one batched sentiment pass in process_companies
+COMPANY_BATCH_SIZE = int(os.getenv('PIPELINE_COMPANY_BATCH_SIZE', 32))
+
+
+def write_prediction(output_file, prediction):
+    """
+    Write a prediction file atomically, skipping the write if only its timestamp would change.
+    
+    Returns:
+        True if the file was written
+    """
+    option = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+    try:
+        old_bytes = output_file.read_bytes()
+        old_timestamp = orjson.loads(old_bytes).get('timestamp')
+    except (OSError, orjson.JSONDecodeError, AttributeError):
+        old_bytes = None
+    
+    if old_bytes is not None:
+        unchanged = orjson.dumps({**prediction, 'timestamp': old_timestamp}, default=str, option=option)
+        if unchanged == old_bytes:
+            return False
+    
+    # Readers watching the directory never see a half-written file
+    tmp_file = output_file.with_suffix('.tmp')
+    tmp_file.write_bytes(orjson.dumps(prediction, default=str, option=option))
+    os.replace(tmp_file, output_file)
+    return True
+
 
 class ProcessingPipeline:
     """Orchestrates the complete data processing pipeline"""
@@ -71,6 +104,9 @@ class ProcessingPipeline:
         self.market_predictor = MarketImpactPredictor()
         self.signal_combiner = SignalCombiner()
         
+        # Runs independent stages of process_company alongside the calling thread
+        self.stage_pool = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix='pipeline-stage')
+        
         logger.info("✅ Pipeline initialized successfully")
     
     def get_companies_from_crawler(self):
@@ -79,10 +115,10 @@ class ProcessingPipeline:
             logger.warning(f"⚠️ Crawler directory not found: {CRAWLER_DIR}")
             return []
         
-        companies = [d for d in os.listdir(CRAWLER_DIR) 
-                    if os.path.isdir(CRAWLER_DIR / d)]
+        with os.scandir(CRAWLER_DIR) as it:
+            companies = sorted(e.name for e in it if e.is_dir(follow_symlinks=False))
         logger.info(f"📂 Found {len(companies)} companies with crawled data: {companies}")
-        return sorted(companies)
+        return companies
     
     def read_articles_for_company(self, ticker):
         """Read all articles for a company from crawler output"""
@@ -96,8 +132,8 @@ class ProcessingPipeline:
         # Recursively find all JSON files
         for json_file in ticker_dir.rglob('*.json'):
             try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    article = json.load(f)
+                with open(json_file, 'rb') as f:
+                    article = orjson.loads(f.read())
                     articles.append(article)
             except Exception as e:
                 logger.warning(f"⚠️ Failed to read {json_file}: {e}")
@@ -106,103 +142,155 @@ class ProcessingPipeline:
         return articles
     
     def process_company(self, ticker):
-        """Process company with detailed logging"""
-        logger.info(f"\n{'='*70}")
-        logger.info(f"🔄 PROCESSING: {ticker}")
-        logger.info(f"{'='*70}")
+        """Process company with detailed logging; returns the prediction, or None if none was made"""
+        return self.process_companies([ticker])[ticker]
+    
+    def process_companies(self, tickers):
+        """
+        Process several companies, scoring sentiment for each batch of them in one batched model call.
         
-        try:
-            # Step 1: Read articles
-            logger.info(f"[1/5] Reading articles...")
-            articles = self.read_articles_for_company(ticker)
-            
-            if not articles:
-                logger.warning(f"⚠️ No articles found")
-                return
-            
-            logger.info(f"✅ Found {len(articles)} articles")
-            
-            # Step 2: Classify
-            logger.info(f"[2/5] Classifying articles...")
-            general_articles = []
-            financial_articles = []
+        Args:
+            tickers: Company tickers, processed COMPANY_BATCH_SIZE at a time
             
-            for article in articles:
+        Returns:
+            {ticker: prediction, or None if none was made}
+        """
+        results = {}
+        tickers = iter(tickers)
+        while batch := list(islice(tickers, COMPANY_BATCH_SIZE)):
+            articles_by_ticker = {}
+            for ticker in batch:
+                results[ticker] = None
                 try:
-                    result = self.classifier.classify_article(article)
-                    category = result if isinstance(result, str) else result.get('category', 'general')
-                    
-                    if category == 'financial':
-                        financial_articles.append(article)
-                    else:
-                        general_articles.append(article)
+                    logger.info(f"[1/5] Reading articles for {ticker}...")
+                    articles = self.read_articles_for_company(ticker)
                 except Exception as e:
-                    logger.debug(f"Classification error: {e}")
-                    general_articles.append(article)
+                    logger.error(f"❌ {ticker}: Error: {e}", exc_info=True)
+                    continue
+                if not articles:
+                    logger.warning(f"⚠️ {ticker}: No articles found")
+                    continue
+                articles_by_ticker[ticker] = articles
             
-            logger.info(f"✅ Classified: {len(general_articles)} general, {len(financial_articles)} financial")
+            if not articles_by_ticker:
+                continue
             
-            # Step 3: Sentiment Analysis - THIS IS CRITICAL
-            logger.info(f"[3/5] Analyzing sentiment for {len(articles)} articles...")
-            sentiment_scores = []
+            # Sentiment only needs the raw articles, so the whole batch is scored on a
+            # pool thread while this thread classifies them and extracts financial events
+            sentiment_future = self.stage_pool.submit(
+                self._score_sentiment, [a for articles in articles_by_ticker.values() for a in articles]
+            )
             
-            for i, article in enumerate(articles):
-                content = article.get('content', '') or article.get('summary', '')
-                
-                if not content:
-                    logger.debug(f"  {i+1}/{len(articles)}: No content")
-                    sentiment_scores.append(0.0)
-                    continue
-                
+            financial_events = {}
+            for ticker, articles in articles_by_ticker.items():
                 try:
-                    result = self.sentiment_analyzer.analyze(content)
-                    score = result.get('score', 0.0)
-                    sentiment_scores.append(float(score))
-                    logger.debug(f"  {i+1}/{len(articles)}: {article.get('title', 'N/A')[:50]}... → {score:.3f}")
-                    
+                    financial_events[ticker] = self._analyze_events(ticker, articles)
                 except Exception as e:
-                    logger.warning(f"  {i+1}/{len(articles)}: Error - {e}")
-                    sentiment_scores.append(0.0)
-            
-            avg_sentiment = np.mean(sentiment_scores) if sentiment_scores else 0.0
-            logger.info(f"✅ Sentiment: avg={avg_sentiment:.3f}, min={min(sentiment_scores) if sentiment_scores else 0:.3f}, max={max(sentiment_scores) if sentiment_scores else 0:.3f}")
+                    logger.error(f"❌ {ticker}: Error: {e}", exc_info=True)
             
-            # Step 4: Financial events
-            logger.info(f"[4/5] Analyzing financial events...")
-            financial_events = []
+            try:
+                sentiment_scores = sentiment_future.result()
+            except Exception as e:
+                logger.error(f"❌ Sentiment analysis failed for {list(articles_by_ticker)}: {e}", exc_info=True)
+                continue
             
-            for article in financial_articles[:5]:  # Limit to first 5
+            offset = 0
+            for ticker, articles in articles_by_ticker.items():
+                scores = sentiment_scores[offset:offset + len(articles)]
+                offset += len(articles)
+                if ticker not in financial_events:
+                    continue
                 try:
-                    if hasattr(self.financial_classifier, 'classify'):
-                        events = self.financial_classifier.classify(article.get('content', ''))
-                        if events:
-                            financial_events.extend(events)
-                except:
-                    pass
-            
-            logger.info(f"✅ Financial events: {len(financial_events)}")
-            
-            # Step 5: Generate prediction
-            logger.info(f"[5/5] Generating prediction...")
-            prediction = self._generate_prediction(
-                ticker, 
-                len(articles), 
-                avg_sentiment, 
-                len(financial_events), 
-                financial_events
-            )
-            
-            # Save
-            output_file = OUTPUT_DIR / f"{ticker}_prediction.json"
-            with open(output_file, 'w') as f:
-                json.dump(prediction, f, indent=2, default=str)
-            
+                    results[ticker] = self._save_prediction(ticker, articles, scores, financial_events[ticker])
+                except Exception as e:
+                    logger.error(f"❌ {ticker}: Error: {e}", exc_info=True)
+        
+        return results
+    
+    def _analyze_events(self, ticker, articles):
+        """Classify a company's articles and return the financial events found in them"""
+        logger.info(f"\n{'='*70}")
+        logger.info(f"🔄 PROCESSING: {ticker}")
+        logger.info(f"{'='*70}")
+        logger.info(f"✅ Found {len(articles)} articles")
+        
+        # Step 2: Classify
+        logger.info(f"[2/5] Classifying articles...")
+        general_articles, financial_articles = self._classify(articles)
+        logger.info(f"✅ Classified: {len(general_articles)} general, {len(financial_articles)} financial")
+        
+        # Step 4: Financial events
+        logger.info(f"[4/5] Analyzing financial events...")
+        financial_events = self._financial_events(financial_articles)
+        logger.info(f"✅ Financial events: {len(financial_events)}")
+        return financial_events
+    
+    def _save_prediction(self, ticker, articles, sentiment_scores, financial_events):
+        """Generate and save a company's prediction from its scored articles"""
+        # Step 3: Sentiment Analysis - THIS IS CRITICAL
+        avg_sentiment = np.mean(sentiment_scores) if sentiment_scores else 0.0
+        logger.info(f"✅ {ticker} sentiment: avg={avg_sentiment:.3f}, min={min(sentiment_scores) if sentiment_scores else 0:.3f}, max={max(sentiment_scores) if sentiment_scores else 0:.3f}")
+        
+        # Step 5: Generate prediction
+        logger.info(f"[5/5] Generating prediction for {ticker}...")
+        prediction = self._generate_prediction(
+            ticker, 
+            len(articles), 
+            avg_sentiment, 
+            len(financial_events), 
+            financial_events
+        )
+        
+        # Save
+        output_file = OUTPUT_DIR / f"{ticker}_prediction.json"
+        if write_prediction(output_file, prediction):
             logger.info(f"✅ Saved to {output_file}")
-            logger.info(f"{'='*70}\n")
-            
-        except Exception as e:
-            logger.error(f"❌ Error: {e}", exc_info=True)
+        else:
+            logger.info(f"✅ Prediction unchanged, kept {output_file}")
+        logger.info(f"{'='*70}\n")
+        return prediction
 
+    def _classify(self, articles):
+        """Split articles into (general, financial) lists"""
+        general_articles = []
+        financial_articles = []
+        
+        for article in articles:
+            try:
+                result = self.classifier.classify_article(article)
+                category = result if isinstance(result, str) else result.get('category', 'general')
+                
+                if category == 'financial':
+                    financial_articles.append(article)
+                else:
+                    general_articles.append(article)
+            except Exception as e:
+                logger.debug(f"Classification error: {e}")
+                general_articles.append(article)
+        
+        return general_articles, financial_articles
+    
+    def _score_sentiment(self, articles):
+        """Sentiment score per article, 0.0 where there is no content or analysis fails"""
+        logger.info(f"[3/5] Analyzing sentiment for {len(articles)} articles...")
+        contents = [article.get('content', '') or article.get('summary', '') for article in articles]
+        return [float(result.get('score', 0.0)) for result in self.sentiment_analyzer.batch_analyze(contents)]
+    
+    def _financial_events(self, financial_articles):
+        """Financial events found in the first few financial articles"""
+        financial_events = []
+        
+        for article in financial_articles[:5]:  # Limit to first 5
+            try:
+                if hasattr(self.financial_classifier, 'classify'):
+                    events = self.financial_classifier.classify(article.get('content', ''))
+                    if events:
+                        financial_events.extend(events)
+            except:
+                pass
+        
+        return financial_events
+    
     def _generate_prediction(self, ticker, total_articles, avg_sentiment, financial_event_count, financial_data):
         """Generate final prediction from analysis results"""
         try:
@@ -367,16 +455,9 @@ class ProcessingPipeline:
             logger.warning("⚠️ No companies found in crawler directory")
             return
         
-        successful = 0
-        failed = 0
-        
-        for ticker in companies:
-            try:
-                self.process_company(ticker)
-                successful += 1
-            except Exception as e:
-                logger.error(f"❌ Failed to process {ticker}: {e}", exc_info=True)
-                failed += 1
+        predictions = self.process_companies(companies)
+        successful = sum(1 for prediction in predictions.values() if prediction is not None)
+        failed = len(predictions) - successful
         
         logger.info("\n" + "="*70)
         logger.info("✅ PIPELINE COMPLETE")
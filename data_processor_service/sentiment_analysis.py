@@ -5,17 +5,25 @@ import numpy as np
 import json
 import logging
 import random
+import threading
 from datetime import datetime
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Texts per model forward pass in batch_analyze
+BATCH_SIZE = 32
+
 class SentimentAnalyzer:
     """Sentiment analysis using transformer models"""
     
     def __init__(self):
         logger.info("🚀 Initializing Sentiment Analyzer...")
         
+        # Transformers pipelines aren't thread-safe, and concurrent calls would
+        # oversubscribe torch's own threads: one model call runs at a time
+        self._model_lock = threading.Lock()
+        
         # Try FinBERT first (financial domain-specific)
         try:
             logger.info("Loading FinBERT model...")
@@ -45,6 +53,51 @@ class SentimentAnalyzer:
                 self.model = None
                 self.model_name = "None"
     
+    @staticmethod
+    def _prepare(text):
+        """Return text stripped and truncated for the model, or None if it is too short to score"""
+        if not text or not isinstance(text, str):
+            return None
+        
+        # Clean text
+        text = text.strip()
+        if len(text) < 10:
+            return None
+        
+        # Truncate to max length (avoid memory issues)
+        max_length = 512
+        if len(text) > max_length:
+            text = text[:max_length]
+        return text
+    
+    def _to_result(self, prediction):
+        """Convert one model prediction ({'label', 'score'}) to a sentiment result"""
+        label = prediction.get('label', '').upper()
+        score = float(prediction.get('score', 0.5))
+        
+        # Convert label to sentiment score (-1 to 1)
+        if 'POSITIVE' in label or label == 'LABEL_1':
+            # Positive: convert confidence to 0 to 1
+            sentiment_score = score
+        elif 'NEGATIVE' in label or label == 'LABEL_0':
+            # Negative: convert confidence to -1 to 0
+            sentiment_score = -score
+        else:
+            # Neutral
+            sentiment_score = 0.0
+        
+        # Clamp to -1 to 1
+        sentiment_score = max(-1.0, min(1.0, sentiment_score))
+        
+        logger.debug(f"Sentiment result - Label: {label}, Score: {sentiment_score:.3f}, Confidence: {score:.3f}")
+        
+        return {
+            'score': float(sentiment_score),
+            'label': 'POSITIVE' if sentiment_score > 0.1 else 'NEGATIVE' if sentiment_score < -0.1 else 'NEUTRAL',
+            'confidence': float(score),
+            'model': self.model_name
+        }
+    
     def analyze(self, text: str):
         """
         Analyze sentiment of text
@@ -55,56 +108,23 @@ class SentimentAnalyzer:
         Returns:
             dict with score (-1 to 1) and label
         """
-        if not text or not isinstance(text, str):
+        text = self._prepare(text)
+        if text is None:
             return {'score': 0.0, 'label': 'NEUTRAL'}
         
-        # Clean text
-        text = text.strip()
-        if len(text) < 10:
-            return {'score': 0.0, 'label': 'NEUTRAL'}
-        
-        # Truncate to max length (avoid memory issues)
-        max_length = 512
-        if len(text) > max_length:
-            text = text[:max_length]
-        
         try:
             if self.model is None:
                 logger.warning("Model not loaded, returning neutral")
                 return {'score': 0.0, 'label': 'NEUTRAL'}
             
             # Get prediction
-            result = self.model(text, truncation=True, max_length=512)
+            with self._model_lock:
+                result = self.model(text, truncation=True, max_length=512)
             
             if not result or len(result) == 0:
                 return {'score': 0.0, 'label': 'NEUTRAL'}
             
-            prediction = result[0]
-            label = prediction.get('label', '').upper()
-            score = float(prediction.get('score', 0.5))
-            
-            # Convert label to sentiment score (-1 to 1)
-            if 'POSITIVE' in label or label == 'LABEL_1':
-                # Positive: convert confidence to 0 to 1
-                sentiment_score = score
-            elif 'NEGATIVE' in label or label == 'LABEL_0':
-                # Negative: convert confidence to -1 to 0
-                sentiment_score = -score
-            else:
-                # Neutral
-                sentiment_score = 0.0
-            
-            # Clamp to -1 to 1
-            sentiment_score = max(-1.0, min(1.0, sentiment_score))
-            
-            logger.debug(f"Sentiment result - Label: {label}, Score: {sentiment_score:.3f}, Confidence: {score:.3f}")
-            
-            return {
-                'score': float(sentiment_score),
-                'label': 'POSITIVE' if sentiment_score > 0.1 else 'NEGATIVE' if sentiment_score < -0.1 else 'NEUTRAL',
-                'confidence': float(score),
-                'model': self.model_name
-            }
+            return self._to_result(result[0])
             
         except Exception as e:
             logger.error(f"❌ Sentiment analysis error: {e}")
@@ -134,24 +154,42 @@ class SentimentAnalyzer:
         """
         return self.analyze(text)
     
-    def batch_analyze(self, texts):
+    def batch_analyze(self, texts, batch_size=BATCH_SIZE):
         """
-        Analyze sentiment for multiple texts
+        Analyze sentiment for multiple texts in batched model calls
         
         Args:
             texts: List of texts to analyze
+            batch_size: Texts per forward pass
             
         Returns:
-            list of {'score': float, 'label': str}
+            list of {'score': float, 'label': str}, one per text
         """
-        results = []
-        for text in texts:
-            try:
-                result = self.analyze(text)
-                results.append(result)
-            except Exception as e:
-                logger.warning(f"⚠️ Error analyzing text: {e}")
-                results.append({'score': 0.0, 'label': 'NEUTRAL'})
+        results = [{'score': 0.0, 'label': 'NEUTRAL'} for _ in texts]
+        prepared = [(i, text) for i, text in enumerate(map(self._prepare, texts)) if text is not None]
+        
+        if not prepared:
+            return results
+        if self.model is None:
+            logger.warning("Model not loaded, returning neutral")
+            return results
+        
+        try:
+            with self._model_lock:
+                predictions = self.model(
+                    [text for _, text in prepared], batch_size=batch_size, truncation=True, max_length=512
+                )
+        except Exception as e:
+            logger.warning(f"⚠️ Batched sentiment failed ({e}), analyzing texts one by one")
+            for i, text in prepared:
+                results[i] = self.analyze(text)
+            return results
+        
+        for (i, _), prediction in zip(prepared, predictions):
+            # top_k pipelines return a list of predictions per text
+            if isinstance(prediction, list):
+                prediction = prediction[0]
+            results[i] = self._to_result(prediction)
         
         return results
     
@@ -3,6 +3,7 @@ import axios from 'axios';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
 const WS_BASE_URL = process.env.REACT_APP_WS_URL || `${window.location.protocol === 'https:' ? 'wss' : 'ws'}://${window.location.hostname}:8000`;
+const wsTextDecoder = new TextDecoder('utf-8');
 
 
 // Update cadence
@@ -212,6 +213,8 @@ export const usePredictions = () => {
   const connectWebSocket = useCallback(() => {
     try {
       const ws = new WebSocket(WS_BASE_URL);
+      // Binary frames carry UTF-8 JSON; read them as ArrayBuffer so they decode synchronously
+      ws.binaryType = 'arraybuffer';
 
       ws.onopen = () => {
         setConnected(true);
@@ -220,7 +223,8 @@ export const usePredictions = () => {
 
       ws.onmessage = (event) => {
         try {
-          const message = JSON.parse(event.data);
+          const raw = typeof event.data === 'string' ? event.data : wsTextDecoder.decode(event.data);
+          const message = JSON.parse(raw);
 
           if (message.type === 'prediction_updated') {
             const updatedRaw = message.prediction || message.data;
@@ -22,6 +22,7 @@ const API_BASE_URL = rawApiBase.replace(/\/$/, '').endsWith('/api')
   : `${rawApiBase.replace(/\/$/, '')}/api`;
 
 const WS_BASE_URL = process.env.REACT_APP_WS_URL || `${window.location.protocol === 'https:' ? 'wss' : 'ws'}://${window.location.hostname}:8000`;
+const wsTextDecoder = new TextDecoder('utf-8');
 
 
 const StockDetail = () => {
@@ -159,6 +160,8 @@ const StockDetail = () => {
 
     try {
       const ws = new WebSocket(WS_BASE_URL);
+      // Binary frames carry UTF-8 JSON; read them as ArrayBuffer so they decode synchronously
+      ws.binaryType = 'arraybuffer';
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -169,7 +172,8 @@ const StockDetail = () => {
 
       ws.onmessage = (event) => {
         try {
-          const message = JSON.parse(event.data);
+          const raw = typeof event.data === 'string' ? event.data : wsTextDecoder.decode(event.data);
+          const message = JSON.parse(raw);
           console.log('📨 WebSocket message:', message.type, message);
 
           // Do NOT setCompanyData here for prediction updates
@@ -0,0 +1,20 @@
+"""
+Shared helpers for the unit tests
+"""
+import sys
+import importlib.util
+from unittest.mock import patch
+
+
+def installed(name):
+    """True if an optional dependency can be imported"""
+    return importlib.util.find_spec(name) is not None
+
+
+def load_module_without(module, *blocked):
+    """Load a fresh copy of a module as if the blocked optional dependencies weren't installed"""
+    with patch.dict(sys.modules, dict.fromkeys(blocked)):
+        spec = importlib.util.spec_from_file_location(f"_fallback_{module.__name__.rsplit('.', 1)[-1]}", module.__file__)
+        fallback = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(fallback)
+    return fallback
@@ -4,14 +4,21 @@ Unit tests for Web Crawler Service
 import os
 import sys
 import json
+import random
+import sqlite3
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
+import yaml
+
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from crawler_service.utils.dedup import is_duplicate, mark_as_seen, get_seen_count, clear_dedupe_db
+from crawler_service.utils.dedup import is_duplicate, is_duplicate_many, mark_as_seen, get_seen_count, clear_dedupe_db
+from crawler_service.utils import dedup, company_matcher
 from crawler_service.utils.company_matcher import CompanyMatcher
+from tests.support import installed, load_module_without
 
 
 class TestCrawlerDedup(unittest.TestCase):
@@ -31,6 +38,15 @@ class TestCrawlerDedup(unittest.TestCase):
         # Second time should be duplicate
         self.assertTrue(is_duplicate(url))
     
+    def test_is_duplicate_many(self):
+        """Test batch duplicate detection"""
+        mark_as_seen("https://example.com/old")
+        urls = ["https://example.com/new", "https://example.com/old", "https://example.com/new"]
+        
+        # Repeats within the batch count as duplicates after the first
+        self.assertEqual(is_duplicate_many(urls), [False, True, True])
+        self.assertTrue(is_duplicate("https://example.com/new"))
+    
     def test_mark_as_seen(self):
         """Test marking URLs as seen"""
         url = "https://example.com/article"
@@ -49,6 +65,42 @@ class TestCrawlerDedup(unittest.TestCase):
         mark_as_seen("https://example.com/2", "Article 2")
         
         self.assertEqual(get_seen_count(), 2)
+    
+    def test_url_hash_collision(self):
+        """Test that a URL whose hash is taken by another URL is not a duplicate"""
+        with patch("crawler_service.utils.dedup.url_key", return_value=42):
+            self.assertFalse(is_duplicate("https://example.com/a"))
+            self.assertFalse(is_duplicate("https://example.com/b"))
+            self.assertTrue(is_duplicate("https://example.com/a"))
+            self.assertFalse(is_duplicate("https://example.com/b"))
+            self.assertEqual(
+                is_duplicate_many(["https://example.com/a", "https://example.com/b"]),
+                [True, False]
+            )
+    
+    def insert_from_other_process(self, url):
+        """Insert a URL through a separate connection, as another crawler process would"""
+        with sqlite3.connect(dedup.DB_PATH) as other:
+            other.execute(
+                "INSERT INTO seen_urls (url_hash, url, seen_at) VALUES (?, ?, '')",
+                (dedup.url_key(url), url)
+            )
+        other.close()
+    
+    def test_is_duplicate_sees_other_connections(self):
+        """Test that a URL inserted elsewhere after the Bloom filter loaded is a duplicate"""
+        self.assertFalse(is_duplicate("https://example.com/local"))
+        self.insert_from_other_process("https://example.com/remote")
+        self.assertTrue(is_duplicate("https://example.com/remote"))
+    
+    def test_is_duplicate_many_sees_other_connections(self):
+        """Test that batch checks don't report URLs inserted elsewhere as new"""
+        self.assertEqual(is_duplicate_many(["https://example.com/local"]), [False])
+        self.insert_from_other_process("https://example.com/remote")
+        self.assertEqual(
+            is_duplicate_many(["https://example.com/remote", "https://example.com/other", "https://example.com/local"]),
+            [True, False, True]
+        )
 
 
 class TestCompanyMatcher(unittest.TestCase):
@@ -74,6 +126,41 @@ class TestCompanyMatcher(unittest.TestCase):
             "general_keywords": ["supply chain", "logistics", "shipping"]
         }
     
+    def _write_config(self):
+        config_file = tempfile.NamedTemporaryFile("w", suffix=".yml", delete=False)
+        with config_file:
+            yaml.safe_dump(self.test_config, config_file)
+        self.addCleanup(os.remove, config_file.name)
+        return config_file.name
+    
+    @unittest.skipUnless(installed("ahocorasick"), "pyahocorasick not installed")
+    def test_automaton_matches_regex_fallback(self):
+        """Test that Aho-Corasick matching gives the same results as the regex fallback"""
+        self.test_config["companies"].append({
+            "name": "C.H. Robinson",
+            "ticker": "CHRW",
+            "keywords": ["C.H. Robinson", "CHRW", "Robinson"],
+            "sector": "Logistics"
+        })
+        config_path = self._write_config()
+        fallback = load_module_without(company_matcher, "ahocorasick")
+        
+        fast = CompanyMatcher(config_path)
+        slow = fallback.CompanyMatcher(config_path)
+        self.assertIsNotNone(fast._automaton)
+        self.assertIsNone(slow._automaton)
+        
+        words = ["FedEx", "fedex's", "FedExes", "UPS", "ups-and-downs", "startups", "United Parcel Service",
+                 "Federal Express", "C.H. Robinson", "c.h. robinsons", "CHRW", "_ups_", "logistics", "the", "and"]
+        rng = random.Random(0)
+        texts = [
+            "FedEx announced strong quarterly earnings today.",
+            "FedEx and UPS are competing for market share in logistics.",
+            "",
+        ] + [rng.choice([" ", "", ", ", "-", "\n"]).join(rng.choices(words, k=12)) for _ in range(500)]
+        for text in texts:
+            self.assertEqual(fast.match_companies(text), slow.match_companies(text), text)
+    
     def test_match_companies_single(self):
         """Test matching a single company"""
         # This would need the actual config file or mock
@@ -0,0 +1,256 @@
+"""
+Unit tests for Data Processor Service
+"""
+import os
+import sys
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add the service directory to path; its modules import each other by bare name
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "data_processor_service"))
+
+from tests.support import installed, load_module_without
+
+try:
+    import orjson
+    import article_classifier
+    from financial_analyzer import earnings_parser, financial_event_classifier
+except ImportError:
+    orjson = article_classifier = earnings_parser = financial_event_classifier = None
+
+try:
+    # Sentiment scoring needs transformers and torch, which none of these tests call
+    with patch.dict(sys.modules, {"sentiment_analysis": MagicMock()}):
+        import process_pipeline
+        import continuous_processor
+except ImportError:
+    process_pipeline = continuous_processor = None
+
+
+def random_texts(words, count, seed=0):
+    """Texts joining random words with spaces, Unicode spaces, punctuation or nothing at all"""
+    rng = random.Random(seed)
+    separators = [" ", " ", "\xa0", "\u2009", ", ", "-", ""]
+    return [rng.choice(separators).join(rng.choices(words, k=rng.randint(0, 12))) for _ in range(count)]
+
+
+@unittest.skipIf(article_classifier is None, "numpy/orjson not installed")
+class TestArticleClassifierFallback(unittest.TestCase):
+    """Test that the Aho-Corasick keyword scan matches the substring fallback"""
+    
+    @unittest.skipUnless(installed("ahocorasick"), "pyahocorasick not installed")
+    def test_automaton_matches_substring_fallback(self):
+        """Test keyword hits and classifications with and without pyahocorasick"""
+        fast = article_classifier.ArticleClassifier()
+        slow = load_module_without(article_classifier, "ahocorasick").ArticleClassifier()
+        self.assertIsNotNone(fast._automaton)
+        self.assertIsNone(slow._automaton)
+        
+        words = sorted(fast.financial_keywords | fast.general_keywords) + ["nonprofit", "Q1:", "$5 billion", "3.5%", "the"]
+        titles = random_texts(words, 300, seed=1)
+        contents = random_texts(words, 300, seed=2)
+        for title, content in zip(titles, contents):
+            article = {"title": title, "content": content * (1 + len(title) % 3 * 60)}
+            self.assertEqual(fast._keyword_hits(content.lower()), slow._keyword_hits(content.lower()))
+            self.assertEqual(fast.classify_article(article), slow.classify_article(article), article["title"])
+
+
+@unittest.skipIf(earnings_parser is None, "numpy/orjson not installed")
+class TestEarningsParserFastPaths(unittest.TestCase):
+    """Test that Hyperscan and RE2 give the same counts and results as plain re"""
+    
+    PHRASES = [
+        "beat wall street estimates", "topped analyst estimate", "missed estimates", "fell short of estimates",
+        "in line with estimates", "as expected", "raised full-year guidance", "cut outlook", "reaffirmed guidance",
+        "kept forecast", "eps of $2.94", "expected eps of $2.82", "$61.8 billion", "$300 million",
+        "31% year-over-year", "5% qoq", "worse than expected", "better than analyst expected", "lowered guidance",
+        "boosted outlook", "trimmed forecast", "\u017ftronger than expected", "filler text",
+    ]
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = load_module_without(earnings_parser, "hyperscan", "re2").EarningsParser()
+        cls.articles = [
+            {"title": title, "content": content}
+            for title, content in zip(random_texts(cls.PHRASES, 400, seed=3), random_texts(cls.PHRASES, 400, seed=4))
+        ]
+    
+    def assertMatchesReference(self, module):
+        parser = module.EarningsParser()
+        for article in self.articles:
+            text = f"{article['title']} {article['content']}".lower()
+            scan_text = text.encode("utf-8") if module.re2 is not None else text
+            present = parser._present_patterns(scan_text)
+            for pattern, expected in zip(parser._hs_patterns, self.reference._hs_patterns):
+                self.assertEqual(parser._count(pattern, scan_text, present), len(expected.findall(text)), text)
+            
+            result = parser.parse_article(article)
+            expected = self.reference.parse_article(article)
+            result.pop("analysis_timestamp")
+            expected.pop("analysis_timestamp")
+            self.assertEqual(result, expected, text)
+    
+    @unittest.skipUnless(installed("hyperscan") and installed("re2"), "hyperscan and google-re2 not both installed")
+    def test_hyperscan_and_re2(self):
+        """Test both fast paths together"""
+        self.assertMatchesReference(earnings_parser)
+    
+    @unittest.skipUnless(installed("hyperscan"), "hyperscan not installed")
+    def test_hyperscan_only(self):
+        """Test Hyperscan prefiltering with re counting"""
+        self.assertMatchesReference(load_module_without(earnings_parser, "re2"))
+    
+    @unittest.skipUnless(installed("re2"), "google-re2 not installed")
+    def test_re2_only(self):
+        """Test RE2 counting without Hyperscan"""
+        self.assertMatchesReference(load_module_without(earnings_parser, "hyperscan"))
+    
+    def test_lone_surrogates(self):
+        """Test that text with lone surrogates parses like it does under plain re"""
+        for article in [{"content": "a\ud800b"}, {"title": "q3 \udfff", "content": "eps of $2.94 beat estimates\ud800"}]:
+            result = earnings_parser.EarningsParser().parse_article(article)
+            expected = self.reference.parse_article(article)
+            result.pop("analysis_timestamp")
+            expected.pop("analysis_timestamp")
+            self.assertEqual(result, expected)
+
+
+@unittest.skipIf(financial_event_classifier is None, "numpy/orjson not installed")
+class TestFinancialEventClassifier(unittest.TestCase):
+    """Test keyword scanning fast paths and batch output"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = load_module_without(financial_event_classifier, "hyperscan", "ahocorasick").FinancialEventClassifier()
+        words = sorted(cls.reference._all_keywords) + ["the", "company", "nonbuyer", "$4.5 billion", "eps: $1.10", "7%"]
+        cls.articles = [
+            {"title": title, "content": content}
+            for title, content in zip(random_texts(words, 400, seed=5), random_texts(words, 400, seed=6))
+        ]
+    
+    def assertMatchesReference(self, module):
+        classifier = module.FinancialEventClassifier()
+        for article in self.articles:
+            self.assertEqual(classifier.classify_event(article), self.reference.classify_event(article), article)
+    
+    @unittest.skipUnless(installed("hyperscan"), "hyperscan not installed")
+    def test_hyperscan_matches_substring_fallback(self):
+        """Test the Hyperscan literal set against per-keyword substring checks"""
+        self.assertMatchesReference(financial_event_classifier)
+    
+    @unittest.skipUnless(installed("ahocorasick"), "pyahocorasick not installed")
+    def test_automaton_matches_substring_fallback(self):
+        """Test the Aho-Corasick automaton against per-keyword substring checks"""
+        self.assertMatchesReference(load_module_without(financial_event_classifier, "hyperscan"))
+    
+    def test_lone_surrogates(self):
+        """Test that text with lone surrogates classifies like the substring fallback"""
+        article = {"title": "merger \ud800", "content": "acquisition\udfff announced, eps: $1.10"}
+        self.assertEqual(
+            financial_event_classifier.FinancialEventClassifier().classify_event(article),
+            self.reference.classify_event(article)
+        )
+    
+    def test_process_batch_slim_output(self):
+        """Test that slim results drop article content and nothing else"""
+        with tempfile.TemporaryDirectory() as tmp:
+            input_dir = os.path.join(tmp, "financial")
+            os.makedirs(input_dir)
+            articles = self.articles[:20]
+            with open(os.path.join(input_dir, "MSFT_financial.json"), "wb") as f:
+                f.write(orjson.dumps(articles))
+            
+            classifier = financial_event_classifier.FinancialEventClassifier()
+            full_summary = classifier.process_batch(input_dir, os.path.join(tmp, "full"), slim=False)
+            slim_summary = classifier.process_batch(input_dir, os.path.join(tmp, "slim"))
+            self.assertEqual(full_summary, slim_summary)
+            
+            with open(os.path.join(tmp, "full", "MSFT_financial_analysis.json"), "rb") as f:
+                full = orjson.loads(f.read())
+            with open(os.path.join(tmp, "slim", "MSFT_financial_analysis.json"), "rb") as f:
+                slim = orjson.loads(f.read())
+        
+        self.assertEqual([a["content"] for a in full["articles"]], [a["content"] for a in articles])
+        for output in (full, slim):
+            output.pop("analyzed_at")
+            for article in output["articles"]:
+                article["financial_analysis"].pop("analyzed_at")
+                article.pop("content", None)
+        self.assertEqual(full, slim)
+
+
+@unittest.skipIf(process_pipeline is None, "data processor dependencies not installed")
+class TestWritePrediction(unittest.TestCase):
+    """Test prediction file writes"""
+    
+    def test_timestamp_only_change_is_skipped(self):
+        """Test that a prediction differing only in its timestamp is not rewritten"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "MSFT_prediction.json"
+            prediction = {"ticker": "MSFT", "signal": "BUY", "timestamp": "2025-01-01T00:00:00"}
+            
+            self.assertTrue(process_pipeline.write_prediction(path, prediction))
+            written = path.read_bytes()
+            
+            self.assertFalse(process_pipeline.write_prediction(path, {**prediction, "timestamp": "2025-01-02T00:00:00"}))
+            self.assertEqual(path.read_bytes(), written)
+            
+            self.assertTrue(process_pipeline.write_prediction(path, {**prediction, "signal": "SELL"}))
+            self.assertEqual(orjson.loads(path.read_bytes())["signal"], "SELL")
+
+
+@unittest.skipIf(continuous_processor is None, "data processor dependencies not installed")
+class TestContentDigestCache(unittest.TestCase):
+    """Test that process_tickers skips companies whose articles are unchanged"""
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        
+        self.pipeline = MagicMock()
+        self.pipeline.process_companies.side_effect = lambda tickers: {
+            ticker: {"ticker": ticker, "signal": "BUY", "timestamp": "2025-01-01T00:00:00"} for ticker in tickers
+        }
+        self.article = self.root / "by_company" / "MSFT" / "2025-01-01" / "a.json"
+        self.article.parent.mkdir(parents=True)
+        self.article.write_bytes(b'{"title": "Microsoft earnings"}')
+    
+    def make_processor(self):
+        with patch.object(continuous_processor, "get_pipeline", return_value=self.pipeline):
+            processor = continuous_processor.ArticleProcessor()
+        processor.crawler_data_dir = self.root / "by_company"
+        processor.output_dir = self.root / "final_predictions"
+        processor.cache_dir = self.root / "cache"
+        processor.output_dir.mkdir(exist_ok=True)
+        processor.cache_dir.mkdir(exist_ok=True)
+        return processor
+    
+    def test_unchanged_articles_reuse_prediction(self):
+        """Test that a second run over the same files doesn't call the pipeline"""
+        processor = self.make_processor()
+        self.assertEqual(processor.process_tickers(["MSFT"]), {"MSFT": True})
+        self.assertEqual(processor.process_tickers(["MSFT"]), {"MSFT": True})
+        self.assertEqual(self.pipeline.process_companies.call_count, 1)
+        self.assertTrue((processor.output_dir / "MSFT_prediction.json").exists())
+        
+        # A restarted processor reads the digest back from disk
+        self.assertEqual(self.make_processor().process_tickers(["MSFT"]), {"MSFT": True})
+        self.assertEqual(self.pipeline.process_companies.call_count, 1)
+    
+    def test_changed_articles_are_reprocessed(self):
+        """Test that editing an article file reruns the pipeline"""
+        processor = self.make_processor()
+        processor.process_tickers(["MSFT"])
+        self.article.write_bytes(b'{"title": "Microsoft misses estimates"}')
+        processor.process_tickers(["MSFT"])
+        self.assertEqual(self.pipeline.process_companies.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()